@@ -1,6 +1,6 @@
 import streamlit as st
 import asyncio
-from backend.graph import DoTACotGraph
+from backend.graph import get_graph
 import nest_asyncio
 from dotenv import load_dotenv
 nest_asyncio.apply()
@@ -15,13 +15,24 @@ query = st.text_input("Enter your research question", placeholder="e.g., What ar
 run_button = st.button("Run Agent")
 
 if run_button and query:
-    graph = DoTACotGraph(query=query)
+    # Shared across reruns: nodes and the compiled workflow are only built once per process
+    graph = get_graph()
 
     placeholder = st.empty()
+    live = st.empty()
     output_messages = []
+    partial = {}
 
     async def run_graph():
-        async for state in graph.run(thread={"thread_id": "ui"}):
+        async for state in graph.run(thread={"thread_id": "ui"}, stream_tokens=True, query=query):
+            if "token" in state:
+                # Partial answers, one block per plan step plus the final summary
+                event = state["token"]
+                key = "📝 Summary" if event["node"] == "summary" else f"💬 Step {event.get('step', 0) + 1}"
+                partial[key] = partial.get(key, "") + event["delta"]
+                live.markdown("\n\n".join(f"**{k}**\n\n{v}" for k, v in partial.items()))
+                continue
+
             # Flatten sub-states into the main state dictionary
             flat_state = {}
             for key, val in state.items():
@@ -0,0 +1,398 @@
+"""
+Async serving layer for the DoTA RAG CoT research graph.
+
+    uvicorn application:app --host 0.0.0.0 --port 8000
+
+POST /research                   {"query": ..., "job_id"?: ...} -> 202 {"job_id", "status", "position"};
+                                 429 (with Retry-After) when every run slot and queue place is taken
+GET  /research/{job_id}          status, and the result once the run is done
+GET  /research/{job_id}/stream   progress events as server-sent events
+WS   /ws/{job_id}                the same progress events over a WebSocket
+WS   /ws                         send {"query": ...}, then receive that job's events
+GET  /health                     run slots and queue usage
+GET  /metrics                    per-node time, external waits, tokens and cost (Prometheus text format)
+
+Every job runs on one shared compiled graph (`get_graph()`, or the graph passed to
+`create_app`). At most GRAPH_MAX_RUNNING runs execute at once and up to
+GRAPH_MAX_QUEUED more wait in FIFO order; beyond that requests are rejected
+instead of piling up behind the OpenAI / Cohere / Pinecone rate limits.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sse_starlette.sse import EventSourceResponse
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+
+from backend.graph import DoTACotGraph, get_graph
+from backend.utils.tracing import get_metrics
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+TERMINAL = {"done", "failed"}
+
+
+class Saturated(Exception):
+    """Every run slot and queue place is taken."""
+
+
+@dataclass
+class Job:
+    job_id: str
+    query: str
+    status: str = "queued"
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    seen_messages: int = 0
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """
+    Admission control and progress fan-out for graph runs.
+
+    `max_running` worker tasks take jobs from a bounded queue, so at most that
+    many runs hold API connections at once. Each job keeps its event history,
+    so a client that subscribes late (or reconnects) replays it before getting
+    live events. Finished jobs are kept for `job_ttl` seconds, with their token
+    events merged into one per node and step.
+    """
+
+    def __init__(self, graph=None, max_running: int = 8, max_queued: int = 64,
+                 run_timeout: float = 300, job_ttl: float = 3600):
+        self.graph = graph
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.run_timeout = run_timeout
+        self.job_ttl = job_ttl
+        self.jobs: Dict[str, Job] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self.running = 0
+        self.stats = {"accepted": 0, "rejected": 0, "done": 0, "failed": 0}
+        self._workers: List[asyncio.Task] = []
+
+    @classmethod
+    def from_env(cls, graph=None):
+        return cls(
+            graph=graph,
+            max_running=int(os.environ.get("GRAPH_MAX_RUNNING", 8)),
+            max_queued=int(os.environ.get("GRAPH_MAX_QUEUED", 64)),
+            run_timeout=float(os.environ.get("GRAPH_RUN_TIMEOUT", 300)),
+            job_ttl=float(os.environ.get("JOB_TTL", 3600)),
+        )
+
+    async def start(self):
+        if self.graph is None:
+            # Building the nodes and compiling takes a moment, keep it off the event loop
+            self.graph = await asyncio.to_thread(get_graph)
+        self.queue = asyncio.Queue(maxsize=self.max_queued)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_running)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def _evict(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [j.job_id for j in self.jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def submit(self, query: str, job_id: str = None) -> Job:
+        self._evict()
+        job_id = job_id or uuid.uuid4().hex
+        existing = self.jobs.get(job_id)
+        if existing is not None and existing.status not in TERMINAL:
+            raise ValueError(f"Job {job_id} is already {existing.status}")
+
+        job = Job(job_id=job_id, query=query)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise Saturated()
+        self.jobs[job_id] = job
+        self.stats["accepted"] += 1
+        await self._publish(job, {"type": "queued", "position": self.queue.qsize()})
+        return job
+
+    async def _publish(self, job: Job, event: Dict[str, Any], status: str = None):
+        async with job.changed:
+            job.events.append(event)
+            # The final event and the terminal status become visible together
+            if status is not None:
+                job.status = status
+                if status in TERMINAL:
+                    # Readers already streaming keep the full list; later replays get the merged one
+                    job.events = self._collapse_tokens(job.events)
+            job.changed.notify_all()
+
+    @staticmethod
+    def _collapse_tokens(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        `events` with the token events of each node (and step) merged into one, where the first one was.
+        """
+        collapsed, deltas = [], {}
+        for event in events:
+            if event.get("type") != "token":
+                collapsed.append(event)
+                continue
+            key = json.dumps({k: v for k, v in event.items() if k != "delta"}, sort_keys=True, default=str)
+            if key not in deltas:
+                deltas[key] = (dict(event), [])
+                collapsed.append(deltas[key][0])
+            deltas[key][1].append(event.get("delta", ""))
+        for merged, parts in deltas.values():
+            merged["delta"] = "".join(parts)
+        return collapsed
+
+    async def events(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """
+        The job's events from the beginning, then live ones until it finishes.
+        """
+        # The list is replaced (not edited) once the job finishes, so indexes into it stay valid
+        events, index = job.events, 0
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(lambda: index < len(events) or job.status in TERMINAL)
+                pending = events[index:]
+                finished = job.status in TERMINAL
+            for event in pending:
+                yield event
+            index += len(pending)
+            if finished and index >= len(events):
+                return
+
+    async def _worker(self):
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+                self.queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        await self._publish(job, {"type": "started", "waited": round(job.started_at - job.created_at, 3)})
+        try:
+            async with asyncio.timeout(self.run_timeout):
+                async for update in self.graph.run(
+                    {"configurable": {"thread_id": job.job_id}},
+                    stream_tokens=True,
+                    query=job.query,
+                    job_id=job.job_id,
+                ):
+                    for event in self._progress(job, update):
+                        await self._publish(job, event)
+        except Exception as e:
+            logger.exception("Job %s failed", job.job_id)
+            job.error = str(e) or type(e).__name__
+            status = "failed"
+            event = {"type": "error", "error": job.error}
+        else:
+            status = "done" if job.result is not None else "failed"
+            if job.result is None:
+                job.error = "Run ended without a summary"
+            event = {"type": status, "result": job.result, "error": job.error}
+        self.stats[status] += 1
+        job.finished_at = time.time()
+        event["elapsed"] = round(job.finished_at - job.started_at, 3)
+        await self._publish(job, event, status)
+
+    def _progress(self, job: Job, update: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Turn one graph update into JSON-ready progress events.
+        """
+        if "token" in update:
+            return [dict(update["token"])]
+
+        events = []
+        for node, state in update.items():
+            if not isinstance(state, dict):
+                continue
+            if node == "execute_step":
+                for result in state.get("step_results", []):
+                    events.append({
+                        "type": "step",
+                        "step": result["step"],
+                        "intent": result.get("intent", ""),
+                        "answer": result.get("answer", ""),
+                    })
+                continue
+
+            # Nodes return the whole state, so only forward messages not sent yet
+            messages = state.get("messages", [])
+            new_messages = messages[job.seen_messages:]
+            job.seen_messages = max(job.seen_messages, len(messages))
+            events.append({
+                "type": "node",
+                "node": node,
+                "messages": [getattr(m, "content", str(m)) for m in new_messages],
+            })
+            if node == "summary":
+                job.result = DoTACotGraph.result(state)
+        return events
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "jobs": len(self.jobs),
+            **self.stats,
+        }
+
+
+def create_app(graph=None, manager: JobManager = None) -> Starlette:
+    """
+    Build the ASGI app. Pass `graph` (anything with DoTACotGraph's `run`) to serve
+    a stand-in instead of the shared production graph, e.g. for load tests.
+    """
+    manager = manager or JobManager.from_env(graph)
+    retry_after = os.environ.get("GRAPH_RETRY_AFTER", "5")
+
+    def saturated() -> JSONResponse:
+        return JSONResponse(
+            {"error": "Server is at capacity, retry later", **manager.health()},
+            status_code=429,
+            headers={"Retry-After": retry_after},
+        )
+
+    async def submit(request: Request):
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return JSONResponse({"error": "Body must be JSON"}, status_code=400)
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return JSONResponse({"error": "'query' is required"}, status_code=400)
+        try:
+            job = await manager.submit(query.strip(), body.get("job_id"))
+        except Saturated:
+            return saturated()
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=409)
+        return JSONResponse(
+            {"job_id": job.job_id, "status": job.status, "position": job.events[0]["position"]},
+            status_code=202,
+        )
+
+    def get_job(request: Request) -> Optional[Job]:
+        return manager.jobs.get(request.path_params["job_id"])
+
+    async def result(request: Request):
+        job = get_job(request)
+        if job is None:
+            return JSONResponse({"error": "Unknown job_id"}, status_code=404)
+        return JSONResponse(job.info())
+
+    async def stream(request: Request):
+        job = get_job(request)
+        if job is None:
+            return JSONResponse({"error": "Unknown job_id"}, status_code=404)
+
+        async def sse():
+            async for event in manager.events(job):
+                yield {"event": event["type"], "data": json.dumps(event, ensure_ascii=False)}
+
+        return EventSourceResponse(sse(), ping=15)
+
+    async def websocket(ws: WebSocket):
+        await ws.accept()
+        try:
+            job_id = ws.path_params.get("job_id")
+            if job_id is None:
+                message = await ws.receive_json()
+                query = message.get("query") if isinstance(message, dict) else None
+                if not isinstance(query, str) or not query.strip():
+                    await ws.send_json({"type": "error", "error": "'query' is required"})
+                    await ws.close(code=1008)
+                    return
+                try:
+                    job = await manager.submit(query.strip(), message.get("job_id"))
+                except Saturated:
+                    await ws.send_json({"type": "error", "status": 429, "error": "Server is at capacity, retry later"})
+                    await ws.close(code=1013)
+                    return
+                except ValueError as e:
+                    await ws.send_json({"type": "error", "status": 409, "error": str(e)})
+                    await ws.close(code=1008)
+                    return
+            else:
+                job = manager.jobs.get(job_id)
+                if job is None:
+                    await ws.send_json({"type": "error", "status": 404, "error": "Unknown job_id"})
+                    await ws.close(code=1008)
+                    return
+
+            await ws.send_json({"type": "job", "job_id": job.job_id})
+            async for event in manager.events(job):
+                await ws.send_json(event)
+            await ws.close()
+        except WebSocketDisconnect:
+            # The run keeps going; the client can reconnect or fetch the result
+            pass
+
+    async def health(request: Request):
+        return JSONResponse(manager.health())
+
+    async def metrics(request: Request):
+        return PlainTextResponse(get_metrics().prometheus(), media_type="text/plain; version=0.0.4")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        await manager.start()
+        try:
+            yield
+        finally:
+            await manager.stop()
+
+    app = Starlette(
+        routes=[
+            Route("/research", submit, methods=["POST"]),
+            Route("/research/{job_id}", result),
+            Route("/research/{job_id}/stream", stream),
+            WebSocketRoute("/ws", websocket),
+            WebSocketRoute("/ws/{job_id}", websocket),
+            Route("/health", health),
+            Route("/metrics", metrics),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.jobs = manager
+    return app
+
+
+app = create_app()
@@ -0,0 +1,159 @@
+"""
+Batch research: run a file of questions through the shared graph.
+
+    python -m backend.batch questions.csv --out rag_outputs/batch_results.jsonl --concurrency 8
+
+Questions come from CSV (a `query` or `question` column) or JSONL (same keys),
+with an optional `id` column; rows without one are keyed by a hash of the
+question. Every question runs on the one compiled graph from `get_graph()`, so
+clients and the LLM / embedding caches are shared by the whole batch, and at
+most `--concurrency` runs are in flight at once.
+
+Each finished row is appended to the output JSONL (final_summary, all_answers,
+sources) and flushed, so an interrupted batch resumes where it stopped:
+questions with a successful row are skipped and failed ones are retried.
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from dotenv import load_dotenv
+from tqdm import tqdm
+
+from .graph import get_graph
+
+
+def question_id(query: str) -> str:
+    return hashlib.sha256(query.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def read_questions(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield {"id", "query"} rows from a CSV or JSONL file, skipping rows without a question.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".json"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            query = (row.get("query") or row.get("question") or "").strip()
+            if query:
+                yield {"id": str(row.get("id") or question_id(query)), "query": query}
+
+
+def completed_ids(path: Path) -> Set[str]:
+    """
+    Ids whose latest row in an existing output file succeeded.
+    """
+    latest: Dict[str, bool] = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line of a crashed run may be cut off
+                    continue
+                latest[row["id"]] = not row.get("error")
+    return {question for question, ok in latest.items() if ok}
+
+
+def _percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+async def research(graph, row: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    started = time.perf_counter()
+    summary_state: Optional[Dict[str, Any]] = None
+    record = {"id": row["id"], "query": row["query"]}
+    try:
+        async with asyncio.timeout(timeout):
+            async for update in graph.run({"configurable": {"thread_id": row["id"]}}, query=row["query"], job_id=row["id"]):
+                if "summary" in update:
+                    summary_state = update["summary"]
+        if summary_state is None:
+            raise RuntimeError("Run ended without a summary")
+        record.update(graph.result(summary_state))
+    except Exception as e:
+        record["error"] = str(e) or type(e).__name__
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+async def run_batch(questions_path: str, out_path: str, concurrency: int = 4,
+                    timeout: float = 600, graph=None) -> Dict[str, Any]:
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    done = completed_ids(out_path)
+    seen: Set[str] = set()
+    pending = []
+    for row in read_questions(questions_path):
+        if row["id"] not in done and row["id"] not in seen:
+            pending.append(row)
+        seen.add(row["id"])
+    print(f"📋 {len(seen)} questions, {len(seen) - len(pending)} already answered, {len(pending)} to run")
+
+    graph = graph or await asyncio.to_thread(get_graph)
+    stats = {"ok": 0, "failed": 0, "skipped": len(seen) - len(pending), "latencies": []}
+    queue: asyncio.Queue = asyncio.Queue()
+    for row in pending:
+        queue.put_nowait(row)
+
+    progress = tqdm(total=len(pending), desc="Researching")
+    started = time.perf_counter()
+    with open(out_path, "a", encoding="utf-8") as out:
+        async def worker():
+            while not queue.empty():
+                record = await research(graph, queue.get_nowait(), timeout)
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                if record.get("error"):
+                    stats["failed"] += 1
+                    progress.write(f"❌ {record['id']}: {record['error']}")
+                else:
+                    stats["ok"] += 1
+                    stats["latencies"].append(record["elapsed"])
+                progress.update(1)
+
+        await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    progress.close()
+
+    elapsed = time.perf_counter() - started
+    latencies = stats.pop("latencies")
+    stats.update({
+        "elapsed": elapsed,
+        "per_minute": stats["ok"] / elapsed * 60 if elapsed else 0.0,
+        "p50": _percentile(latencies, 0.5),
+        "p95": _percentile(latencies, 0.95),
+    })
+    print(
+        f"✅ {stats['ok']} answered, {stats['failed']} failed, {stats['skipped']} skipped in {elapsed:.1f}s "
+        f"({stats['per_minute']:.1f} questions/min, p50 {stats['p50']:.1f}s, p95 {stats['p95']:.1f}s)"
+    )
+    print(f"📁 Results in {out_path}")
+    return stats
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run a file of research questions through the graph.")
+    parser.add_argument("questions", help="CSV or JSONL with a query/question column and an optional id")
+    parser.add_argument("--out", default="rag_outputs/batch_results.jsonl")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("BATCH_CONCURRENCY", 4)))
+    parser.add_argument("--timeout", type=float, default=float(os.environ.get("BATCH_TIMEOUT", 600)),
+                        help="Seconds per question before it is recorded as failed")
+    args = parser.parse_args()
+    asyncio.run(run_batch(args.questions, args.out, args.concurrency, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .state import InputState, ResearchState
+from .state import InputState, ResearchState, StepState
 
-__all__ = ["InputState", "ResearchState"] 
\ No newline at end of file
+__all__ = ["InputState", "ResearchState", "StepState"] 
@@ -1,4 +1,19 @@
-from typing import TypedDict, Optional, Required, Dict, List, Any
+from typing import TypedDict, Optional, Required, Dict, List, Any, Annotated
+
+
+def merge_step_results(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge parallel step answers keyed by step index (idempotent, since nodes return the full state)."""
+    by_step = {result["step"]: result for result in left or []}
+    by_step.update({result["step"]: result for result in right or []})
+    return [by_step[step] for step in sorted(by_step)]
+
+
+def merge_traces(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge node trace entries by id (idempotent, since nodes return the full state)."""
+    merged = {entry["id"]: entry for entry in left or []}
+    merged.update({entry["id"]: entry for entry in right or []})
+    return list(merged.values())
+
 
 # Define the input state
 class InputState(TypedDict, total=False):
@@ -20,4 +35,25 @@ class ResearchState(InputState):
     all_answers: List[Dict[str, Any]]
     cot_query: Optional[str]
     final_summary: Optional[str]
-    
\ No newline at end of file
+    # Answers of parallel step branches, merged in plan order by StepSchedulerNode
+    step_results: Annotated[List[Dict[str, Any]], merge_step_results]
+    # One entry per node run (wall time, external waits, tokens, cost), see utils.tracing
+    trace: Annotated[List[Dict[str, Any]], merge_traces]
+
+# State of a single plan step branch (cot_executor → ... → generate)
+class StepState(TypedDict, total=False):
+    job_id: str
+    query: str
+    cot_plan: List[Dict[str, Any]]
+    current_step: int
+    current_intent: Optional[str]
+    messages: List[Any]
+    cot_query: Optional[str]
+    rewritten_query: Optional[str]
+    expanded_query: Optional[str]
+    namespace: Optional[str]
+    documents: List[Dict[str, Any]]
+    answer: Optional[str]
+    all_answers: List[Dict[str, Any]]
+    done: bool
+    trace: Annotated[List[Dict[str, Any]], merge_traces]
@@ -1,9 +1,10 @@
 import logging
-from typing import Any, AsyncIterator, Dict
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
 
 from langchain_core.messages import SystemMessage
 from langgraph.graph import StateGraph, END
-from .classes.state import InputState,ResearchState
+from .classes.state import InputState,ResearchState,StepState
 from .nodes.rewrite_query import RewriteQueryNode
 from .nodes.namespace_prediction import NamespacePredictionNode
 from .nodes.search import SearchNode
@@ -14,6 +15,8 @@ from .nodes.cot_executor import CotExecutorNode
 from .nodes.summary import SummaryNode
 from .nodes.expansion import ExpansionNode
 from .nodes.rerank_summary import RerankSummaryNode
+from .nodes.step_scheduler import StepSchedulerNode
+from .utils.tracing import traced
 logger = logging.getLogger(__name__)
 
 
@@ -29,6 +32,20 @@ class DoTACotGraph:
             messages=[SystemMessage(content="🔍 Starting DoTA RAG Cot Research Agent...")]
         )
         self._init_nodes()
+        self._compiled = None
+        self._compile_lock = threading.Lock()
+
+    def input_for(self, query: str = None, job_id=None) -> InputState:
+        """
+        Fresh input state for one run; without arguments, the query this graph was created with.
+        """
+        return InputState(
+            query=self.query if query is None else query,
+            job_id=self.job_id if job_id is None else job_id,
+            current_step=self.input_state["current_step"],
+            done=self.input_state["done"],
+            messages=[SystemMessage(content="🔍 Starting DoTA RAG Cot Research Agent...")]
+        )
 
     def _init_nodes(self):
         self.planner = CoTPlannerNode()
@@ -41,66 +58,149 @@ class DoTACotGraph:
         self.generate = GenerateNode()
         self.summary = SummaryNode()
         self.expansion = ExpansionNode()
+        self.scheduler = StepSchedulerNode(step_node="execute_step", done_node="summary")
+
+    @staticmethod
+    def _add_node(workflow: StateGraph, name: str, fn, step_node: bool = False):
+        # Every node reports wall time, external waits, tokens and cost to the run's trace
+        workflow.add_node(name, traced(name, fn, step_node=step_node))
+
+    def _build_step_workflow(self):
+        # One plan step: the common execution chain, run as an independent branch
+        workflow = StateGraph(StepState)
+        self._add_node(workflow, "cot_executor", self.cot_executor.run, step_node=True)
+        self._add_node(workflow, "rewrite_query", self.rewrite_query.run, step_node=True)
+        self._add_node(workflow, "expansion", self.expansion.run, step_node=True)
+        self._add_node(workflow, "predict_namespace", self.predict_namespace.run, step_node=True)
+        self._add_node(workflow, "search", self.search.run, step_node=True)
+        self._add_node(workflow, "rerank", self.rerank.run, step_node=True)
+        self._add_node(workflow, "rerank_summary", self.rerank_summary.run, step_node=True)
+        self._add_node(workflow, "generate", self.generate.run, step_node=True)
+
+        workflow.set_entry_point("cot_executor")
+        workflow.add_edge("cot_executor", "rewrite_query")
+        workflow.add_edge("rewrite_query", "expansion")
+        workflow.add_edge("expansion", "predict_namespace")
+        workflow.add_edge("predict_namespace", "search")
+        workflow.add_edge("search", "rerank")
+        workflow.add_edge("rerank", "rerank_summary")
+        workflow.add_edge("rerank_summary", "generate")
+        workflow.add_edge("generate", END)
+        return workflow
+
+    async def execute_step(self, state: StepState) -> Dict[str, Any]:
+        """
+        Run one plan step through the execution chain and report its answer.
+        """
+        step_index = state.get("current_step", 0)
+        result = await self.step_graph.ainvoke(state)
+
+        answers = result.get("all_answers", [])
+        if answers and answers[-1].get("step") == step_index:
+            answer = dict(answers[-1])
+        else:
+            step = state.get("cot_plan", [])[step_index]
+            answer = {
+                "step": step_index,
+                "intent": step.get("intent", ""),
+                "rewritten_query": result.get("rewritten_query", ""),
+                "answer": "No relevant documents were found for this step.",
+                "sources": [],
+            }
+        answer["messages"] = result.get("messages", [])
+        # Bubble the step's node traces up into the run's trace
+        return {"step_results": [answer], "trace": result.get("trace", [])}
 
     def _build_workflow(self):
         self.workflow = StateGraph(InputState, recursion_limit=2000)
-        # Initial planner
-        self.workflow.add_node("cot_planner", self.planner.run)
+        self.step_graph = self._build_step_workflow().compile()
 
-        # CotExecutor to decide what to do
-        self.workflow.add_node("cot_executor", self.cot_executor.run)
-        self.workflow.add_node("summary", self.summary.run)
+        # Initial planner
+        self._add_node(self.workflow, "cot_planner", self.planner.run)
 
-        # Common execution chain
-        self.workflow.add_node("rewrite_query", self.rewrite_query.run)
-        self.workflow.add_node("expansion", self.expansion.run)
-        self.workflow.add_node("predict_namespace", self.predict_namespace.run)
-        self.workflow.add_node("search", self.search.run)
-        self.workflow.add_node("rerank", self.rerank.run)
-        self.workflow.add_node("rerank_summary", self.rerank_summary.run)
-        self.workflow.add_node("generate", self.generate.run)
+        # Plan steps fan out as parallel branches and are merged in plan order
+        self._add_node(self.workflow, "execute_step", self.execute_step)
+        self._add_node(self.workflow, "merge_steps", self.scheduler.merge)
+        self._add_node(self.workflow, "summary", self.summary.run)
 
         # Entry
         self.workflow.set_entry_point("cot_planner")
-        self.workflow.add_edge("cot_planner", "cot_executor")
-
-        # Chain
-        self.workflow.add_edge("rewrite_query", "expansion")
-        self.workflow.add_edge("expansion", "predict_namespace")
-        self.workflow.add_edge("predict_namespace", "search")
-        self.workflow.add_edge("search", "rerank")
-        self.workflow.add_edge("rerank", "rerank_summary")
-        self.workflow.add_edge("rerank_summary", "generate")
-        
-        self.workflow.add_edge("summary", END)
-
-
-        def should_continue(state: ResearchState) -> str:
-            current_step = state.get("current_step", 0)
-            plan = state.get("cot_plan", [])
-            if current_step >= len(plan):
-                return "summary"
-            return "cot_executor"
-
         self.workflow.add_conditional_edges(
-            "generate", should_continue, {
-                "cot_executor": "cot_executor",
-                "summary": "summary",
+            "cot_planner", self.scheduler.dispatch, ["execute_step", "summary"]
+        )
+        self.workflow.add_edge("execute_step", "merge_steps")
 
-            }
+        # Dispatch the next wave of steps whose dependencies are answered, or summarize
+        self.workflow.add_conditional_edges(
+            "merge_steps", self.scheduler.dispatch, ["execute_step", "summary"]
         )
-        
-        self.workflow.add_edge("cot_executor", "rewrite_query")
 
+        self.workflow.add_edge("summary", END)
 
-    async def run(self, thread: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
-        self._build_workflow()
-        
-        compiled_graph = self.workflow.compile()
+    async def run(self, thread: Dict[str, Any], stream_tokens: bool = False,
+                  query: str = None, job_id=None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield `{node: update}` after each node. With `stream_tokens`, also yield
+        `{"token": {"node", "delta", ...}}` for every chunk GenerateNode (per step)
+        and SummaryNode produce, as soon as the model emits it.
+
+        `query` / `job_id` override the ones given to the constructor, so one
+        compiled graph (see `get_graph`) can serve every request.
+        """
+        compiled_graph = self.compile()
+        input_state = self.input_for(query, job_id)
         thread["recursion_limit"] = 100
-        async for state in compiled_graph.astream(self.input_state, thread):
-            yield state
+        if not stream_tokens:
+            async for state in compiled_graph.astream(input_state, thread):
+                yield state
+            return
+
+        # Step subgraphs emit their tokens from inside execute_step, so subgraph events are included
+        async for namespace, mode, chunk in compiled_graph.astream(
+            input_state, thread, stream_mode=["updates", "custom"], subgraphs=True
+        ):
+            if mode == "custom":
+                yield {"token": chunk}
+            elif not namespace:
+                yield chunk
+
+    @staticmethod
+    def result(summary_state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        final_summary, all_answers (without step messages), deduplicated sources and the trace of a finished run.
+        """
+        all_answers = [
+            {k: v for k, v in answer.items() if k != "messages"}
+            for answer in summary_state.get("all_answers", [])
+        ]
+        return {
+            "final_summary": summary_state.get("final_summary", ""),
+            "all_answers": all_answers,
+            "sources": SummaryNode.collect_sources(all_answers),
+            "trace": summary_state.get("trace", []),
+        }
 
     def compile(self):
-        self._build_workflow()
-        return self.workflow.compile()
\ No newline at end of file
+        # Nodes keep no per-run state, so the workflow is built and compiled once per instance
+        with self._compile_lock:
+            if self._compiled is None:
+                self._build_workflow()
+                self._compiled = self.workflow.compile()
+            return self._compiled
+
+
+_graph: Optional[DoTACotGraph] = None
+_graph_lock = threading.Lock()
+
+
+def get_graph() -> DoTACotGraph:
+    """
+    Process-wide DoTACotGraph: nodes, API clients and the compiled workflow are
+    created on first use and shared by every run. Pass `query` / `job_id` to `run()`.
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = DoTACotGraph()
+            _graph.compile()
+        return _graph
@@ -1,11 +1,14 @@
 from langchain_core.messages import AIMessage
+from ..utils.cache import get_llm_cache
+from ..utils.token_budget import Segment, TokenBudget
 from ..classes import ResearchState
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
 class CotExecutorNode:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0)
+        self.llm = ChatOpenAI(model="gpt-4o", temperature=0, cache=get_llm_cache())
+        self.budget = TokenBudget.from_env("cot_executor", 1500, "gpt-4o")
 
     async def run(self, state: ResearchState) -> ResearchState:
         plan = state.get("cot_plan", [])
@@ -21,11 +24,12 @@ class CotExecutorNode:
             AIMessage(content=f"🧭 Step {current_step + 1}: {step['step']} (intent={step['intent']})")
         )
 
-        # CoT reasoning: summarize reasoning context using previous answers + current step
-        previous_answers = "\n\n".join(
-            f"Step {i + 1} Answer:\n{a['answer']}"
-            for i, a in enumerate(state.get("all_answers", []))
-        )
+        # CoT reasoning: summarize reasoning context using the answers this step depends on + current step,
+        # packed to the token budget (earlier steps are cut first, each keeps its opening)
+        previous_answers = self.budget.pack([
+            Segment(f"Step {a['step'] + 1} Answer:\n{a['answer']}", priority=a["step"], min_tokens=64)
+            for a in state.get("all_answers", [])
+        ])
         step_instruction = step["step"]
         context = f"{previous_answers}\n\nNext task:\n{step_instruction}" if previous_answers else f"Next task:\n{step_instruction}"
 
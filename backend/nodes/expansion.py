@@ -1,11 +1,12 @@
 from langchain_core.messages import AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import ChatOpenAI
+from ..utils.cache import get_llm_cache
 from ..classes import ResearchState
 
 class ExpansionNode:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, cache=get_llm_cache())
 
     async def run(self, state: ResearchState) -> ResearchState:
         """
@@ -1,10 +1,11 @@
 from langchain_core.messages import AIMessage
 from langchain_openai import ChatOpenAI 
 from ..classes import ResearchState
+from ..utils.streaming import stream_llm
 
 class GenerateNode:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
+        self.llm = ChatOpenAI(model="gpt-4o", temperature=0.2, stream_usage=True)
 
     async def run(self, state: ResearchState) -> ResearchState:
         """
@@ -37,8 +38,8 @@ User Query: \"{query}\"
 Summarized Context:
 {summarized_context}
 """
-        response = await self.llm.ainvoke(prompt)
-        answer = response.content.strip()
+        # Tokens are published on the "custom" stream as they arrive
+        answer = (await stream_llm(self.llm, prompt, "generate", step=state.get("current_step", 0))).strip()
 
         # Update state
         state["answer"] = answer
@@ -1,19 +1,100 @@
+import asyncio
+import logging
+import os
+import time
+from langchain_core.load import dumps
 from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI  
+from langchain_openai import ChatOpenAI
 from collections import Counter
+from ..utils.cache import get_llm_cache
 from ..classes import ResearchState
+from ..utils.embedding_cache import get_embeddings
+from ..utils.namespace_classifier import load_default_classifier
+
+logger = logging.getLogger(__name__)
+
+
 class NamespacePredictionNode:
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    def __init__(self, votes: int = 4, mode: str = None, use_classifier: bool = True):
+        self.votes = votes
+        # "concurrent": N parallel requests, stop at majority; "single_call": one request with n choices
+        self.mode = mode or os.environ.get("NAMESPACE_VOTE_MODE", "concurrent")
+        # Votes bypass the LLM cache: with one shared key they would all miss together on a cold
+        # cache and all replay the same answer on a warm one, so they would not be separate samples.
+        # The aggregated namespace is cached instead, under the voter's (model, params, prompt) key.
+        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, cache=False)
+        self.voter_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, n=votes, cache=False)
+        self.cache = get_llm_cache()
+
+        # Local centroid classifier; the LLM vote is only the fallback for low-margin queries
+        self.classifier = load_default_classifier() if use_classifier else None
+        if self.classifier:
+            # Same cache as SearchNode, so the query is only embedded once per step
+            self.embedding = get_embeddings()
+
+    async def _vote(self, prompt):
+        started = time.perf_counter()
+        response = await self.llm.ainvoke(prompt)
+        return response.content.strip().lower(), time.perf_counter() - started
+
+    async def _concurrent_votes(self, prompt, candidate_namespaces):
+        """
+        Fire all votes at once and cancel the rest as soon as one namespace has a majority.
+        """
+        majority = self.votes // 2 + 1
+        tasks = [asyncio.create_task(self._vote(prompt)) for _ in range(self.votes)]
+        votes, latencies = [], []
+        try:
+            for next_vote in asyncio.as_completed(tasks):
+                vote, latency = await next_vote
+                latencies.append(latency)
+                if vote in candidate_namespaces:
+                    votes.append(vote)
+                    if Counter(votes)[vote] >= majority:
+                        break
+        finally:
+            for task in tasks:
+                task.cancel()
+        # What the old one-after-another loop would have paid for every vote
+        sequential_estimate = sum(latencies) / len(latencies) * self.votes if latencies else 0.0
+        return votes, sequential_estimate
+
+    async def _single_call_votes(self, prompt, candidate_namespaces):
+        """
+        Get every vote from one request using n choices.
+        """
+        started = time.perf_counter()
+        result = await self.voter_llm.agenerate([prompt])
+        latency = time.perf_counter() - started
+        votes = [
+            generation.text.strip().lower()
+            for generation in result.generations[0]
+        ]
+        return [v for v in votes if v in candidate_namespaces], latency * self.votes
 
     async def run(self, state:ResearchState)-> ResearchState:
         """
-        Predict the namespace using 4-vote ensemble from LLM responses.
+        Predict the namespace using an N-vote ensemble of LLM responses (concurrent or single-call).
         """
         query = state.get("rewritten_query", "")
         candidate_namespaces = ["economy", "fund", "unknown"]
 
+        if self.classifier:
+            started = time.perf_counter()
+            label, margin = self.classifier.predict(await self.embedding.aembed_query(query))
+            if self.classifier.is_confident(margin):
+                logger.info(
+                    "Namespace from centroids: %s (margin %.3f) in %.2fs, LLM vote skipped",
+                    label, margin, time.perf_counter() - started,
+                )
+                state["namespace"] = label
+                state.setdefault("messages", []).append(
+                    AIMessage(content=f"📐 Centroid classifier: {label} (margin {margin:.3f})\n🔍 Predicted namespace: {label}")
+                )
+                return state
+
         prompt_template = ChatPromptTemplate.from_messages([
             ("system",
             "You are a classification assistant for English financial queries related to mutual fund analysis, macroeconomic data, company earnings, and stock market updates.\n"
@@ -24,14 +105,26 @@ class NamespacePredictionNode:
             "- 'What is the inflation rate in May 2024?' → macro"),
             ("human", "Query: {input}")
         ])
+        prompt = prompt_template.format_messages(input=query)
+
+        if self.cache is not None:
+            cache_key = (dumps(prompt), self.llm._get_llm_string())
+            cached = await self.cache.alookup(*cache_key)
+            if cached:
+                predicted_namespace = cached[0].text
+                logger.info("Namespace from cache: %s, LLM vote skipped", predicted_namespace)
+                state["namespace"] = predicted_namespace
+                state.setdefault("messages", []).append(
+                    AIMessage(content=f"💾 Cached namespace vote\n🔍 Predicted namespace: {predicted_namespace}")
+                )
+                return state
 
-        votes = []
-        for _ in range(4):
-            prompt = prompt_template.format_messages(input=query)
-            response = await self.llm.ainvoke(prompt)
-            vote = response.content.strip().lower()
-            if vote in candidate_namespaces:
-                votes.append(vote)
+        started = time.perf_counter()
+        if self.mode == "single_call":
+            votes, sequential_estimate = await self._single_call_votes(prompt, candidate_namespaces)
+        else:
+            votes, sequential_estimate = await self._concurrent_votes(prompt, candidate_namespaces)
+        elapsed = time.perf_counter() - started
 
         # Aggregate votes
         counted = Counter(votes)
@@ -40,6 +133,15 @@ class NamespacePredictionNode:
         else:
             predicted_namespace = "unknown"
 
+        logger.info(
+            "Namespace votes (%s): %s -> %s in %.2fs (~%.2fs saved vs sequential)",
+            self.mode, dict(counted), predicted_namespace, elapsed, max(sequential_estimate - elapsed, 0.0),
+        )
+
+        # Only a real majority is worth replaying, not the "unknown" fallback for zero valid votes
+        if self.cache is not None and counted:
+            await self.cache.aupdate(*cache_key, [ChatGeneration(message=AIMessage(content=predicted_namespace))])
+
         # Update state
         state["namespace"] = predicted_namespace
         if "messages" not in state:
@@ -48,4 +150,4 @@ class NamespacePredictionNode:
             AIMessage(content=f"🗳️ Namespace votes: {dict(counted)}\n🔍 Predicted namespace: {predicted_namespace}")
         )
 
-        return state
\ No newline at end of file
+        return state
@@ -2,14 +2,40 @@ from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.messages import AIMessage
+from ..utils.cache import get_llm_cache
 from ..classes import InputState, ResearchState
 
 
 class CoTPlannerNode:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o", temperature=0)
+        self.llm = ChatOpenAI(model="gpt-4o", temperature=0, cache=get_llm_cache())
         self.parser = JsonOutputParser()  
 
+    @staticmethod
+    def normalize_plan(plan) -> list:
+        """
+        Ensure every step has a "depends_on" list that only points at earlier steps,
+        so the step scheduler can never dead-lock on a cycle.
+        """
+        if isinstance(plan, dict):
+            plan = plan.get("steps") or plan.get("plan") or [plan]
+
+        normalized = []
+        for index, step in enumerate(plan):
+            depends_on = step.get("depends_on") or []
+            if not isinstance(depends_on, list):
+                depends_on = [depends_on]
+            valid = []
+            for dep in depends_on:
+                try:
+                    dep = int(dep)
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= dep < index and dep not in valid:
+                    valid.append(dep)
+            normalized.append({**step, "intent": step.get("intent", "unknown"), "depends_on": valid})
+        return normalized
+
     async def run(self, state: ResearchState) -> ResearchState:
         query = state.get("query", "")
         format_instructions = self.parser.get_format_instructions()
@@ -28,6 +54,8 @@ class CoTPlannerNode:
         - Each step must include:
         - "step": a short description of the subtask
         - "intent": one of: economy, fund, unknown
+        - "depends_on": list of 0-based indexes of earlier steps whose answers this step needs ([] if independent)
+        - Prefer independent steps so they can be researched in parallel.
 
         Example:
         User query: "What funds should you buy in the economy right now?"
@@ -41,7 +69,7 @@ class CoTPlannerNode:
 
         try:
             response = await self.llm.ainvoke(prompt)
-            plan = self.parser.parse(response.content)  
+            plan = self.normalize_plan(self.parser.parse(response.content))
             state["cot_plan"] = plan
             state.setdefault("messages", []).append(
                 AIMessage(content="🧠 CoT plan: " + str(plan))
@@ -49,7 +77,7 @@ class CoTPlannerNode:
             return state
 
         except Exception as e:
-            state["cot_plan"] = [{"step": "fallback reasoning", "intent": "unknown"}]
+            state["cot_plan"] = [{"step": "fallback reasoning", "intent": "unknown", "depends_on": []}]
             state.setdefault("messages", []).append(
                 AIMessage(content=f"⚠️ CoT planning failed: {str(e)}")
             )
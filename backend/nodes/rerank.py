@@ -1,42 +1,86 @@
+import asyncio
+import logging
 import os
+import weakref
 import cohere
+import httpx
 from langchain_core.messages import AIMessage
+from nltk.tokenize import word_tokenize
 from ..classes import ResearchState
+from ..utils.tracing import track_call
 from rank_bm25 import BM25Okapi
 
+logger = logging.getLogger(__name__)
+
+
 class RerankNode:
-    def __init__(self):
-        self.client = cohere.Client(os.environ["COHERE_API_KEY"])
+    def __init__(self, top_n: int = 10, timeout: float = None):
+        self.top_n = top_n
+        # Latency budget for one Cohere call; past it we keep the BM25 order
+        self.timeout = timeout or float(os.environ.get("RERANK_TIMEOUT", "8"))
+        self.api_key = os.environ["COHERE_API_KEY"]
+        # Pooled connections are bound to an event loop, so keep one client per loop
+        self._clients = weakref.WeakKeyDictionary()
+        self._closers = weakref.WeakKeyDictionary()
+        # A fixed async client (e.g. a preconfigured or simulated backend) used on every loop instead
+        self.client = None
+
+    async def get_client(self) -> cohere.AsyncClient:
+        if self.client is not None:
+            return self.client
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            client = cohere.AsyncClient(self.api_key, timeout=self.timeout, httpx_client=http)
+            self._clients[loop] = client
+            # asyncio.run() finalizes live async generators before closing its loop, so this
+            # one's `finally` closes the pool with the loop (app.py starts a loop per click)
+            closer = self._close_on_shutdown(http)
+            await closer.__anext__()
+            self._closers[loop] = closer
+        return client
+
+    @staticmethod
+    async def _close_on_shutdown(http: httpx.AsyncClient):
+        try:
+            yield
+        finally:
+            try:
+                await http.aclose()
+            except RuntimeError:
+                # Finalized outside its loop (interpreter exit): the sockets go with the process
+                pass
 
     def compose_rerank_input(self, doc):
         return (
             f"page_content: {doc.get('page_content', '')}\n"
         )
 
-
-    async def run(self, state:ResearchState)->ResearchState:
-        query = state.get("rewritten_query", "")
-        documents = state.get("documents", [])
-
+    @staticmethod
+    def bm25_rank(query, documents):
         try:
-            from nltk.tokenize import word_tokenize
+            tokenized_corpus = [word_tokenize(doc.get("page_content", "")) for doc in documents]
+            tokenized_query = word_tokenize(query)
         except LookupError as e:
             raise RuntimeError(
                 "❌ Missing NLTK tokenizer 'punkt'. Please run: python -m nltk.downloader punkt"
             ) from e
 
-        # BM25 rerank before Cohere rerank
-        tokenized_corpus = [word_tokenize(doc.get("page_content", "")) for doc in documents]
         bm25 = BM25Okapi(tokenized_corpus)
-        tokenized_query = word_tokenize(query)
         bm25_scores = bm25.get_scores(tokenized_query)
 
         for i, score in enumerate(bm25_scores):
             documents[i]["bm25_score"] = score
 
-        # Sort and take top N for semantic rerank
-        documents = sorted(documents, key=lambda d: d["bm25_score"], reverse=True)
-        top_documents = documents[:50]
+        return sorted(documents, key=lambda d: d["bm25_score"], reverse=True)
+
+    async def run(self, state:ResearchState)->ResearchState:
+        query = state.get("rewritten_query", "")
+        documents = state.get("documents", [])
 
         if "messages" not in state:
             state["messages"] = []
@@ -47,15 +91,32 @@ class RerankNode:
             )
             return state
 
+        # BM25 rerank before Cohere rerank (CPU-bound, so keep it off the event loop)
+        documents = await asyncio.to_thread(self.bm25_rank, query, documents)
+        top_documents = documents[:50]
 
         rerank_inputs = [self.compose_rerank_input(doc) for doc in top_documents]
 
-        response = self.client.rerank(
-            model="rerank-v3.5",  
-            query=query,
-            documents=rerank_inputs,
-            top_n=10
-        )
+        try:
+            with track_call("rerank"):
+                response = await asyncio.wait_for(
+                    (await self.get_client()).rerank(
+                        model="rerank-v3.5",
+                        query=query,
+                        documents=rerank_inputs,
+                        top_n=self.top_n
+                    ),
+                    timeout=self.timeout,
+                )
+        except Exception as e:
+            # Degrade gracefully: the BM25 order is still a usable ranking
+            reason = "timed out" if isinstance(e, asyncio.TimeoutError) else f"failed: {e}"
+            logger.warning("Cohere rerank %s; falling back to BM25 order", reason)
+            state["documents"] = top_documents[:self.top_n]
+            state["messages"].append(
+                AIMessage(content=f"⚠️ Cohere rerank {reason}. Using top {len(state['documents'])} BM25 results instead.")
+            )
+            return state
 
         reranked = []
         for result in response.results:
@@ -65,10 +126,8 @@ class RerankNode:
 
         # update state
         state["documents"] = reranked
-        if "messages" not in state:
-            state["messages"] = []
         state["messages"].append(
-            AIMessage(content="✅ Re-ranked top 10 results using Cohere Rerank.")
+            AIMessage(content=f"✅ Re-ranked top {self.top_n} results using Cohere Rerank.")
         )
 
-        return state
\ No newline at end of file
+        return state
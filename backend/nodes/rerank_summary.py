@@ -1,10 +1,12 @@
 from langchain_core.messages import AIMessage
 from langchain_openai import ChatOpenAI
 from ..classes import ResearchState
+from ..utils.token_budget import Segment, TokenBudget
 
 class RerankSummaryNode:
     def __init__(self):
         self.llm = ChatOpenAI(model="gpt-4o", temperature=0.2)
+        self.budget = TokenBudget.from_env("rerank_summary", 6000, "gpt-4o")
 
     async def run(self, state: ResearchState) -> ResearchState:
         documents = state.get("documents", [])
@@ -19,7 +21,7 @@ class RerankSummaryNode:
         namespace = state.get("namespace", "unknown")
 
         if namespace == "fund":
-            context = "\n\n".join(
+            blocks = [
                 f"""
 📄 Fund #{i+1}
 - AMC: {doc.get('amc_name', '')}
@@ -31,9 +33,9 @@ class RerankSummaryNode:
 - Key Info: {doc.get('page_content', '')}
 """
                 for i, doc in enumerate(documents)
-            )
+            ]
         elif namespace == "economy":
-            context = "\n\n".join(
+            blocks = [
                 f"""
 📄 Article #{i+1}
 - Headline: {doc.get('article', '')}
@@ -41,12 +43,20 @@ class RerankSummaryNode:
 - Summary: {doc.get('page_content', '')}
 """
                 for i, doc in enumerate(documents)
-            )
+            ]
         else:
-            context = "\n\n".join(
+            blocks = [
                 f"📄 Document #{i+1}\n{doc.get('page_content', '')}"
                 for i, doc in enumerate(documents)
-            )
+            ]
+
+        # Documents arrive in rerank order: the lowest ranked are cut, then dropped, to fit the budget
+        packed = self.budget.fit([
+            Segment(block, priority=-i, min_tokens=120) for i, block in enumerate(blocks)
+        ])
+        # Only cite the documents the model actually saw
+        documents = [doc for doc, block in zip(documents, packed) if block]
+        context = "\n\n".join(block for block in packed if block)
 
         prompt = f"""
 You are a financial assistant AI.
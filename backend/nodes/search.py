@@ -1,22 +1,19 @@
-import os
-from langchain_openai import OpenAIEmbeddings
-from pinecone import Pinecone as PineconeClient
 from ..classes import ResearchState
+from ..utils.embedding_cache import get_embeddings
+from ..vectorstores import get_vector_store
 from langchain_core.messages import AIMessage
 
 class SearchNode:
     def __init__(self):
-        # Embedding model
-        self.embedding = OpenAIEmbeddings(
-            openai_api_key=os.environ["OPENAI_API_KEY"]
-        )
+        # Embedding model, behind the shared query-embedding cache
+        self.embedding = get_embeddings()
 
-        pc = PineconeClient(api_key=os.environ["PINECONE_API_KEY"])
+        # Vector indexes per namespace; the backend (pinecone or local) comes from VECTOR_BACKEND
         self.indexes = {
-            "fund": pc.Index("fund-rag-ocr-index"),
-             "economy": pc.Index("economic-rag-ocr-index"),
-            # "macro": pc.Index("macro-index"),
-            # "stock": pc.Index("stock-index"),
+            "fund": get_vector_store("fund-rag-ocr-index"),
+             "economy": get_vector_store("economic-rag-ocr-index"),
+            # "macro": get_vector_store("macro-index"),
+            # "stock": get_vector_store("stock-index"),
         }
 
     async def run(self, state: ResearchState) -> ResearchState:
@@ -25,22 +22,17 @@ class SearchNode:
         namespace = state.get("namespace", "unknown")
         index = self.indexes.get(namespace, self.indexes["fund"])
 
-        # Embed query
-        vector = self.embedding.embed_query(query)
+        # Embed query without blocking the event loop
+        vector = await self.embedding.aembed_query(query)
 
-        # Semantic search
-        response = index.query(
-            vector=vector,
-            top_k=100,
-            include_metadata=True,
-            include_values=False
-        )
+        # Semantic search, offloaded so other sessions keep running during the round trip
+        matches = await index.aquery(vector, top_k=100)
 
         # Extract documents
         docs = []
-        for match in response.get("matches", []):
-            meta = match.metadata
-            meta["score"] = match.score
+        for match in matches:
+            meta = match["metadata"]
+            meta["score"] = match["score"]
             
             docs.append(meta)
 
@@ -0,0 +1,86 @@
+from typing import Any, Dict, List, Union
+from langchain_core.messages import AIMessage
+from langgraph.types import Send
+from ..classes import ResearchState, StepState
+
+
+class StepSchedulerNode:
+    """
+    Fans the CoT plan out into parallel step branches.
+
+    Every step whose dependencies are answered is dispatched at once as its own
+    branch (cot_executor → rewrite_query → ... → generate). Finished branches are
+    merged back into `all_answers` in plan order before the next wave or the summary.
+    """
+
+    def __init__(self, step_node: str = "execute_step", done_node: str = "summary"):
+        self.step_node = step_node
+        self.done_node = done_node
+
+    @staticmethod
+    def completed_steps(state: ResearchState) -> Dict[int, Dict[str, Any]]:
+        return {result["step"]: result for result in state.get("step_results", [])}
+
+    def ready_steps(self, state: ResearchState) -> List[int]:
+        plan = state.get("cot_plan", [])
+        completed = self.completed_steps(state)
+        pending = [i for i in range(len(plan)) if i not in completed]
+        ready = [
+            i for i in pending
+            if all(dep in completed for dep in plan[i].get("depends_on", []))
+        ]
+        # Dependencies are normalized to earlier steps only, but never stall on a bad plan
+        return ready or pending[:1]
+
+    def dispatch(self, state: ResearchState) -> Union[str, List[Send]]:
+        ready = self.ready_steps(state)
+        if not ready:
+            return self.done_node
+
+        plan = state.get("cot_plan", [])
+        completed = self.completed_steps(state)
+        sends = []
+        for index in ready:
+            # Each branch only sees the answers of the steps it depends on
+            dependency_answers = [
+                completed[dep] for dep in sorted(plan[index].get("depends_on", []))
+            ]
+            branch: StepState = {
+                "job_id": state.get("job_id"),
+                "query": state.get("query", ""),
+                "cot_plan": plan,
+                "current_step": index,
+                "all_answers": [
+                    {k: v for k, v in answer.items() if k != "messages"}
+                    for answer in dependency_answers
+                ],
+                "messages": [],
+            }
+            sends.append(Send(self.step_node, branch))
+        return sends
+
+    async def merge(self, state: ResearchState) -> ResearchState:
+        plan = state.get("cot_plan", [])
+        completed = self.completed_steps(state)
+        ordered = [completed[i] for i in sorted(completed)]
+        already_merged = {a["step"] for a in state.get("all_answers", [])}
+
+        messages = state.setdefault("messages", [])
+        for result in ordered:
+            if result["step"] not in already_merged:
+                messages.extend(result.get("messages", []))
+
+        state["all_answers"] = [
+            {k: v for k, v in result.items() if k != "messages"}
+            for result in ordered
+        ]
+        state["current_step"] = len(ordered)
+        if ordered:
+            state["answer"] = ordered[-1]["answer"]
+
+        if len(ordered) >= len(plan):
+            state["done"] = True
+            messages.append(
+                AIMessage(content=f"🧩 Merged {len(ordered)} step answers in plan order.")
+            )
+        return state
@@ -1,23 +1,45 @@
 from langchain_core.messages import AIMessage
 from langchain_openai import ChatOpenAI
 from ..classes import ResearchState
+from ..utils.streaming import stream_llm
+from ..utils.token_budget import Segment, TokenBudget
 
 class SummaryNode:
     def __init__(self):
-        self.llm = ChatOpenAI(model="o3-mini")
+        self.llm = ChatOpenAI(model="o3-mini", stream_usage=True)
+        self.budget = TokenBudget.from_env("summary", 4000, "o3-mini")
+
+    @staticmethod
+    def collect_sources(all_answers):
+        """
+        Sources of every step answer, without duplicates (by source_url or source_file).
+        """
+        unique_sources = []
+        seen = set()
+        for answer in all_answers:
+            for s in answer.get("sources", []):
+                key = s.get("source_url") or s.get("source_file")
+                if key and key not in seen:
+                    seen.add(key)
+                    unique_sources.append(s)
+        return unique_sources
 
     async def run(self, state: ResearchState) -> ResearchState:
         query = state.get("query", "")
         all_answers = state.get("all_answers", [])
         final_answer = state.get("answer", "")
 
-        # 🧠 Reasoning path
-        history = "\n\n".join(
-            f"Step {a['step']} [{a['intent']}]:\n"
-            f"- Rewritten Query: {a['rewritten_query']}\n"
-            f"- Answer: {a['answer']}"
+        # 🧠 Reasoning path, packed to the token budget (earlier steps are cut first)
+        history = self.budget.pack([
+            Segment(
+                f"Step {a['step']} [{a['intent']}]:\n"
+                f"- Rewritten Query: {a['rewritten_query']}\n"
+                f"- Answer: {a['answer']}",
+                priority=a["step"],
+                min_tokens=80,
+            )
             for a in all_answers
-        )
+        ])
 
         # ✅ Always use English prompt (regardless of query language)
         prompt = f"""
@@ -38,23 +60,11 @@ Use the same language as the original question.
 """
 
         # 🔗 Generate final summary
-        response = await self.llm.ainvoke(prompt)
-        summary = response.content.strip()
+        # Tokens are published on the "custom" stream as they arrive
+        summary = (await stream_llm(self.llm, prompt, "summary")).strip()
 
         # 🧾 Collect sources
-        sources = []
-        for answer in all_answers:
-            if "sources" in answer:
-                sources.extend(answer["sources"])
-
-        # 📋 Remove duplicates based on source_url or source_file
-        unique_sources = []
-        seen = set()
-        for s in sources:
-            key = s.get("source_url") or s.get("source_file")
-            if key and key not in seen:
-                seen.add(key)
-                unique_sources.append(s)
+        unique_sources = self.collect_sources(all_answers)
 
         # 📌 Append source list to summary
         if unique_sources:
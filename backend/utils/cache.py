@@ -0,0 +1,230 @@
+"""
+Persistent caches for deterministic (temperature 0) work.
+
+SQLiteKVStore is a small SQLite-backed key/value store with TTL expiry,
+size-bounded LRU eviction and hit/miss counters. SQLiteLLMCache plugs it
+into LangChain's cache interface so a ChatOpenAI instance created with
+`cache=get_llm_cache()` skips the API for a (model, params, prompt) it has
+already answered.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.load import dumps, loads
+
+# Cached generations are our own serialized output, so the beta notice on loads() is noise
+warnings.filterwarnings("ignore", message="The function `loads` is in beta")
+
+
+class SQLiteKVStore:
+    def __init__(self, path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+        # Cumulative counters survive restarts, so hit rate can be reported across runs
+        self._conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [("hits",), ("misses",)]
+        )
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", ("hits" if hit else "misses",))
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count -= 1
+                row = None
+            if row is not None:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._record(row is not None)
+            self._conn.commit()
+        return row[0] if row is not None else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """
+        Batch lookup in one transaction; returns only the keys that were found.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self.ttl is not None and now - created_at > self.ttl:
+                        continue
+                    found[key] = value
+            if found:
+                self._conn.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", [(now, key) for key in found]
+                )
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self._conn.execute("UPDATE stats SET value = value + ? WHERE name = 'hits'", (len(found),))
+            self._conn.execute("UPDATE stats SET value = value + ? WHERE name = 'misses'", (len(keys) - len(found),))
+            self._conn.commit()
+        return found
+
+    def set_many(self, items: Dict[str, bytes]):
+        now = time.time()
+        with self._lock:
+            for key, value in items.items():
+                exists = self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, sqlite3.Binary(value), now, now),
+                )
+                if not exists:
+                    self._count += 1
+            self._evict()
+            self._conn.commit()
+
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), now, now),
+            )
+            if not exists:
+                self._count += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        if self.max_entries is None or self._count <= self.max_entries:
+            return
+        overflow = self._count - self.max_entries
+        self._conn.execute(
+            "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+            (overflow,),
+        )
+        self._count -= overflow
+
+    def delete(self, key: str):
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM entries WHERE key = ?", (key,)).rowcount
+            self._count -= deleted
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._count = 0
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            totals = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            size = self._conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        total_lookups = totals.get("hits", 0) + totals.get("misses", 0)
+        return {
+            "entries": self._count,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "total_hits": totals.get("hits", 0),
+            "total_misses": totals.get("misses", 0),
+            "total_hit_rate": totals.get("hits", 0) / total_lookups if total_lookups else 0.0,
+        }
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    LangChain cache keyed on (model + params, rendered prompt messages).
+    """
+
+    def __init__(self, store: SQLiteKVStore):
+        self.store = store
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.store.get(self.store.make_key(llm_string, prompt))
+        if value is None:
+            return None
+        generations = [loads(generation) for generation in json.loads(value)]
+        for generation in generations:
+            # Lets the usage tracking tell replayed tokens from billed ones
+            if getattr(generation, "message", None) is not None:
+                generation.message.response_metadata["cache_hit"] = True
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        payload = json.dumps([dumps(generation) for generation in return_val])
+        self.store.set(self.store.make_key(llm_string, prompt), payload.encode("utf-8"))
+
+    def clear(self, **kwargs: Any) -> None:
+        self.store.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.store.stats()
+
+
+_llm_cache: Optional[SQLiteLLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[SQLiteLLMCache]:
+    """
+    Process-wide LLM cache configured from the environment, or None when LLM_CACHE_ENABLED=0.
+
+    LLM_CACHE_PATH (default .cache/llm_cache.sqlite), LLM_CACHE_TTL seconds (default 7 days),
+    LLM_CACHE_MAX_ENTRIES (default 50000).
+    """
+    global _llm_cache
+    if os.environ.get("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = SQLiteLLMCache(SQLiteKVStore(
+                os.environ.get("LLM_CACHE_PATH", ".cache/llm_cache.sqlite"),
+                ttl=float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 3600)),
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 50000)),
+            ))
+        return _llm_cache
@@ -0,0 +1,143 @@
+"""
+Two-tier embedding cache.
+
+Texts are keyed on the embedding model and their normalized form (NFKC,
+collapsed whitespace). Hot vectors live in an in-memory LRU; every vector is
+also kept on disk as raw float32 bytes in a SQLiteKVStore, so query
+embeddings survive restarts and ingestion never re-embeds an unchanged chunk.
+"""
+import asyncio
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from .cache import SQLiteKVStore
+from .tracing import track_call
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    def __init__(self, embeddings: Embeddings, store: Optional[SQLiteKVStore] = None, memory_size: int = 4096):
+        self.embeddings = embeddings
+        self.store = store
+        self.memory_size = memory_size
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self.memory_hits = 0
+
+    def _key(self, text: str) -> str:
+        return SQLiteKVStore.make_key(self.model, normalize_text(text))
+
+    def _remember(self, key: str, vector: np.ndarray):
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._memory_lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self.memory_hits += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if self.store is not None and missing:
+            for key, value in self.store.get_many(missing).items():
+                vector = np.frombuffer(value, dtype=np.float32)
+                self._remember(key, vector)
+                found[key] = vector
+        return found
+
+    def _save(self, vectors: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+        arrays = {key: np.asarray(vector, dtype=np.float32) for key, vector in vectors.items()}
+        for key, vector in arrays.items():
+            self._remember(key, vector)
+        if self.store is not None and arrays:
+            self.store.set_many({key: vector.tobytes() for key, vector in arrays.items()})
+        return arrays
+
+    def _plan(self, texts: List[str]):
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        # Embed each missing normalized text once, even if it repeats in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._plan(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            found.update(self._save(dict(zip(missing.keys(), vectors))))
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._plan([text])
+        if missing:
+            found.update(self._save({keys[0]: self.embeddings.embed_query(text)}))
+        return found[keys[0]].tolist()
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await asyncio.to_thread(self._plan, texts)
+        if missing:
+            with track_call("embedding"):
+                vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            found.update(await asyncio.to_thread(self._save, dict(zip(missing.keys(), vectors))))
+        return [found[key].tolist() for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await asyncio.to_thread(self._plan, [text])
+        if missing:
+            with track_call("embedding"):
+                vector = await self.embeddings.aembed_query(text)
+            found.update(await asyncio.to_thread(self._save, {keys[0]: vector}))
+        return found[keys[0]].tolist()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory_entries": len(self._memory), "memory_hits": self.memory_hits}
+        if self.store is not None:
+            stats.update({f"disk_{name}": value for name, value in self.store.stats().items()})
+        return stats
+
+
+_embeddings: Optional[CachedEmbeddings] = None
+_embeddings_lock = threading.Lock()
+
+
+def get_embeddings() -> CachedEmbeddings:
+    """
+    Process-wide cached OpenAIEmbeddings.
+
+    EMBEDDING_CACHE_PATH (default .cache/embeddings.sqlite; empty for memory only),
+    EMBEDDING_CACHE_MAX_ENTRIES (default 1000000), EMBEDDING_CACHE_MEMORY_SIZE (default 4096).
+    """
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            from langchain_openai import OpenAIEmbeddings
+
+            path = os.environ.get("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite")
+            store = SQLiteKVStore(
+                path, max_entries=int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", 1_000_000))
+            ) if path else None
+            _embeddings = CachedEmbeddings(
+                OpenAIEmbeddings(openai_api_key=os.environ["OPENAI_API_KEY"]),
+                store,
+                memory_size=int(os.environ.get("EMBEDDING_CACHE_MEMORY_SIZE", 4096)),
+            )
+        return _embeddings
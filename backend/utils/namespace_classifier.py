@@ -0,0 +1,216 @@
+"""
+Embedding-centroid namespace classifier.
+
+Routes a query to the `fund` or `economy` index by cosine similarity against
+per-namespace centroids, so NamespacePredictionNode only needs the LLM vote
+when the margin between the two best namespaces is small.
+
+Build centroids from labelled queries and the chunks in rag_outputs/*:
+    python -m backend.utils.namespace_classifier build --labelled queries.jsonl
+
+Compare accuracy and latency against the LLM voter:
+    python -m backend.utils.namespace_classifier eval --labelled queries.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_CENTROIDS_PATH = "rag_outputs/namespace_centroids.npz"
+DEFAULT_MARGIN_THRESHOLD = 0.05
+
+# Chunk folders written by the OCR preparation scripts
+NAMESPACE_SOURCES = {
+    "fund": "rag_outputs/ocr_only",
+    "economy": "rag_outputs/econ_ocr_only",
+}
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms)
+
+
+class CentroidNamespaceClassifier:
+    def __init__(self, labels: Sequence[str], centroids: np.ndarray, threshold: float = DEFAULT_MARGIN_THRESHOLD):
+        self.labels = list(labels)
+        self.centroids = _normalize(np.asarray(centroids, dtype=np.float32))
+        self.threshold = threshold
+
+    @classmethod
+    def fit(cls, vectors_by_label: Dict[str, Sequence[Sequence[float]]], threshold: float = DEFAULT_MARGIN_THRESHOLD):
+        labels = sorted(label for label, vectors in vectors_by_label.items() if len(vectors))
+        centroids = np.stack([
+            _normalize(np.asarray(vectors_by_label[label], dtype=np.float32)).mean(axis=0)
+            for label in labels
+        ])
+        return cls(labels, centroids, threshold)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CENTROIDS_PATH, threshold: float = None):
+        data = np.load(path)
+        saved_threshold = float(data["threshold"]) if "threshold" in data else DEFAULT_MARGIN_THRESHOLD
+        return cls(
+            [str(label) for label in data["labels"]],
+            data["centroids"],
+            saved_threshold if threshold is None else threshold,
+        )
+
+    def save(self, path: str = DEFAULT_CENTROIDS_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            labels=np.array(self.labels),
+            centroids=self.centroids,
+            threshold=np.float32(self.threshold),
+        )
+
+    def scores(self, vector: Sequence[float]) -> Dict[str, float]:
+        query = _normalize(np.asarray(vector, dtype=np.float32))
+        similarities = self.centroids @ query
+        return dict(zip(self.labels, similarities.tolist()))
+
+    def predict(self, vector: Sequence[float]) -> Tuple[str, float]:
+        """
+        Return the closest namespace and its margin over the runner-up.
+        """
+        ranked = sorted(self.scores(vector).items(), key=lambda item: item[1], reverse=True)
+        if len(ranked) == 1:
+            return ranked[0][0], 1.0
+        return ranked[0][0], ranked[0][1] - ranked[1][1]
+
+    def is_confident(self, margin: float) -> bool:
+        return margin >= self.threshold
+
+
+def load_default_classifier():
+    """
+    Load the centroids configured by NAMESPACE_CENTROIDS_PATH, or None when they were never built.
+    """
+    path = os.environ.get("NAMESPACE_CENTROIDS_PATH", DEFAULT_CENTROIDS_PATH)
+    if not Path(path).exists():
+        return None
+    threshold = os.environ.get("NAMESPACE_MARGIN_THRESHOLD")
+    return CentroidNamespaceClassifier.load(path, float(threshold) if threshold else None)
+
+
+def load_labelled_queries(path: str) -> List[Dict[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def sample_chunks(base_dir: str, limit: int, chunk_chars: int = 800) -> List[str]:
+    """
+    Take up to `limit` chunks round-robin across the documents in one rag_outputs folder.
+    """
+    per_document = []
+    for doc_dir in sorted(Path(base_dir).iterdir()) if Path(base_dir).exists() else []:
+        content_path = doc_dir / "content.txt"
+        if not content_path.exists():
+            continue
+        text = content_path.read_text(encoding="utf-8").strip()
+        if text and text != "OCR failed or unavailable":
+            per_document.append([text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)])
+
+    chunks = []
+    for depth in range(max((len(c) for c in per_document), default=0)):
+        for document_chunks in per_document:
+            if depth < len(document_chunks):
+                chunks.append(document_chunks[depth])
+                if len(chunks) >= limit:
+                    return chunks
+    return chunks
+
+
+def build(args):
+    from .embedding_cache import get_embeddings
+
+    embedding = get_embeddings()
+    texts_by_label = {label: sample_chunks(base_dir, args.chunks_per_label) for label, base_dir in NAMESPACE_SOURCES.items()}
+    if args.labelled:
+        for row in load_labelled_queries(args.labelled):
+            if row["namespace"] in texts_by_label:
+                # Queries are closer to what we classify than chunks are, so weight them up
+                texts_by_label[row["namespace"]].extend([row["query"]] * args.query_weight)
+
+    vectors_by_label = {}
+    for label, texts in texts_by_label.items():
+        print(f"🧮 Embedding {len(texts)} examples for '{label}'")
+        unique = list(dict.fromkeys(texts))
+        vectors = dict(zip(unique, embedding.embed_documents(unique))) if unique else {}
+        vectors_by_label[label] = [vectors[text] for text in texts]
+
+    classifier = CentroidNamespaceClassifier.fit(vectors_by_label, threshold=args.threshold)
+    classifier.save(args.out)
+    print(f"✅ Saved centroids for {classifier.labels} to {args.out}")
+
+
+async def evaluate(args):
+    from langchain_openai import OpenAIEmbeddings
+    from ..nodes.namespace_prediction import NamespacePredictionNode
+
+    classifier = CentroidNamespaceClassifier.load(args.centroids, args.threshold)
+    # Uncached on purpose: the latency report should include the embedding round trip
+    embedding = OpenAIEmbeddings(openai_api_key=os.environ["OPENAI_API_KEY"])
+    voter = NamespacePredictionNode(use_classifier=False)
+    rows = load_labelled_queries(args.labelled)
+
+    centroid_hits = llm_hits = hybrid_hits = confident = 0
+    centroid_latency, llm_latency = [], []
+    for row in rows:
+        started = time.perf_counter()
+        label, margin = classifier.predict(await embedding.aembed_query(row["query"]))
+        centroid_latency.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        state = await voter.run({"rewritten_query": row["query"], "messages": []})
+        llm_latency.append(time.perf_counter() - started)
+
+        centroid_hits += label == row["namespace"]
+        llm_hits += state["namespace"] == row["namespace"]
+        if classifier.is_confident(margin):
+            confident += 1
+            hybrid_hits += label == row["namespace"]
+        else:
+            hybrid_hits += state["namespace"] == row["namespace"]
+
+    total = len(rows) or 1
+    print(f"📊 {len(rows)} labelled queries (margin threshold {classifier.threshold})")
+    print(f"- Centroid accuracy: {centroid_hits / total:.1%}  median latency {statistics.median(centroid_latency or [0]) * 1000:.0f} ms")
+    print(f"- LLM vote accuracy: {llm_hits / total:.1%}  median latency {statistics.median(llm_latency or [0]) * 1000:.0f} ms")
+    print(f"- Hybrid accuracy:   {hybrid_hits / total:.1%}  ({confident / total:.1%} of queries skip the LLM)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or evaluate the embedding-centroid namespace classifier.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build centroids from rag_outputs/* and labelled queries")
+    build_parser.add_argument("--labelled", help="JSONL file of {\"query\": ..., \"namespace\": ...}")
+    build_parser.add_argument("--out", default=DEFAULT_CENTROIDS_PATH)
+    build_parser.add_argument("--chunks-per-label", type=int, default=200)
+    build_parser.add_argument("--query-weight", type=int, default=5)
+    build_parser.add_argument("--threshold", type=float, default=DEFAULT_MARGIN_THRESHOLD)
+
+    eval_parser = subparsers.add_parser("eval", help="Compare accuracy and latency against the LLM voter")
+    eval_parser.add_argument("--labelled", required=True)
+    eval_parser.add_argument("--centroids", default=DEFAULT_CENTROIDS_PATH)
+    eval_parser.add_argument("--threshold", type=float, default=None)
+
+    args = parser.parse_args()
+    from dotenv import load_dotenv
+    load_dotenv()
+    if args.command == "build":
+        build(args)
+    else:
+        asyncio.run(evaluate(args))
+
+
+if __name__ == "__main__":
+    main()
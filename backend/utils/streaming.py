@@ -0,0 +1,30 @@
+"""
+Token streaming from inside graph nodes.
+
+Nodes call `stream_llm` instead of `llm.ainvoke`: every chunk is published as a
+`{"type": "token", "node": ..., "delta": ...}` event on LangGraph's "custom"
+stream (plus whatever fields the node adds, e.g. the plan step), and the full
+text is returned once the model is done. Outside a graph run the events are
+simply dropped.
+"""
+from typing import Any
+
+from langgraph.config import get_stream_writer
+
+
+def _writer():
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (no runnable config in context)
+        return lambda event: None
+
+
+async def stream_llm(llm, prompt: Any, node: str, **fields) -> str:
+    write = _writer()
+    parts = []
+    async for chunk in llm.astream(prompt):
+        if chunk.content:
+            parts.append(chunk.content)
+            write({"type": "token", "node": node, "delta": chunk.content, **fields})
+    return "".join(parts)
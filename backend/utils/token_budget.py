@@ -0,0 +1,182 @@
+"""
+Token-budgeted context packing for node prompts.
+
+A node splits the variable part of its prompt (previous answers, documents)
+into `Segment`s with a priority, and `TokenBudget.pack` fits them into the
+node's budget, measured with the model's own tokenizer:
+
+1. if everything fits, the context is returned unchanged;
+2. otherwise segments are truncated, lowest priority first, down to their
+   `min_tokens` (a head of the text is kept, the tail is cut);
+3. if that is still not enough, segments are dropped, lowest priority first.
+
+Segments keep their original order in the packed text. The tokens removed are
+reported to the running node's trace entry (`tokens_saved`).
+
+Budgets come from TOKEN_BUDGET_<NODE> (e.g. TOKEN_BUDGET_RERANK_SUMMARY=6000);
+0 disables packing for that node. When the tiktoken encoding cannot be loaded
+(no network and no cached BPE file), tokens are approximated as 4 characters
+and the encoding is loaded again on a later call.
+"""
+import functools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from .tracing import record_tokens_saved
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARK = " …"
+APPROX_CHARS_PER_TOKEN = 4
+# A tokenizer that failed to load is tried again after this many seconds, approximated meanwhile
+ENCODING_RETRY_SECONDS = 60
+
+# (model, name) -> time.monotonic() of the last failed load
+_failed_at = {}
+
+
+@dataclass
+class Segment:
+    text: str
+    # Higher is more valuable: cut and dropped last
+    priority: float = 0.0
+    # Truncate no further than this many tokens; a segment at its minimum can still be dropped
+    min_tokens: int = 0
+
+
+class ApproxEncoding:
+    """
+    Stand-in for a tiktoken encoding: every `APPROX_CHARS_PER_TOKEN` characters count as one token.
+    """
+
+    def encode(self, text: str, **kwargs) -> List[str]:
+        step = APPROX_CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    def decode(self, tokens: Sequence[str]) -> str:
+        return "".join(tokens)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(model: str = None, name: str = None):
+    # Raises when the encoding cannot be loaded; lru_cache keeps only the encodings that loaded
+    import tiktoken
+
+    if name:
+        return tiktoken.get_encoding(name)
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _encoding(model: str = None, name: str = None):
+    failed_at = _failed_at.get((model, name))
+    if failed_at is not None and time.monotonic() - failed_at < ENCODING_RETRY_SECONDS:
+        return ApproxEncoding()
+    try:
+        encoding = _load_encoding(model, name)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use; packing must not fail a query over it
+        if failed_at is None:
+            logger.warning("No tokenizer for %s (%s), approximating token counts", name or model, e)
+        _failed_at[(model, name)] = time.monotonic()
+        return ApproxEncoding()
+    _failed_at.pop((model, name), None)
+    return encoding
+
+
+def get_encoding(name: str):
+    """
+    The tiktoken encoding `name` (e.g. "cl100k_base"), or `ApproxEncoding` when it cannot be loaded.
+    """
+    return _encoding(name=name)
+
+
+class TokenBudget:
+    def __init__(self, budget: int, model: str = "gpt-4o"):
+        self.budget = budget
+        self.model = model
+
+    @classmethod
+    def from_env(cls, node: str, default: int, model: str = "gpt-4o"):
+        return cls(int(os.environ.get(f"TOKEN_BUDGET_{node.upper()}", default)), model)
+
+    @property
+    def encoding(self):
+        return _encoding(self.model)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        A head of `text` plus TRUNCATION_MARK, at most `max_tokens` tokens with the mark.
+        """
+        encoding = self.encoding
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        if max_tokens <= 0:
+            return ""
+        mark_tokens = len(encoding.encode(TRUNCATION_MARK, disallowed_special=()))
+        mark = TRUNCATION_MARK if max_tokens > mark_tokens else ""
+        # A cut inside a multi-byte character decodes to U+FFFD, drop it
+        head = encoding.decode(tokens[:max_tokens - (mark_tokens if mark else 0)]).rstrip("\ufffd").rstrip()
+        return head + mark
+
+    def pack(self, segments: Sequence[Segment], separator: str = "\n\n") -> str:
+        """
+        Join `segments` with `separator`, cut to fit the budget.
+        """
+        return separator.join(text for text in self.fit(segments) if text)
+
+    def fit(self, segments: Sequence[Segment]) -> List[str]:
+        """
+        The text of each segment cut to fit the budget, in order; "" for dropped segments.
+        """
+        texts = [segment.text for segment in segments]
+        if self.budget <= 0 or not segments:
+            return texts
+
+        counts = [self.count(text) for text in texts]
+        before = sum(counts)
+        over = before - self.budget
+        if over <= 0:
+            return texts
+
+        order = sorted(range(len(segments)), key=lambda i: (segments[i].priority, i))
+        kept = list(texts)
+        sizes = list(counts)
+
+        # Truncate the least valuable segments first, each down to its minimum
+        for i in order:
+            if over <= 0:
+                break
+            floor = min(segments[i].min_tokens, sizes[i])
+            cut = min(sizes[i] - floor, over)
+            if cut > 0:
+                kept[i] = self.truncate(kept[i], sizes[i] - cut)
+                size = self.count(kept[i])
+                over -= sizes[i] - size
+                sizes[i] = size
+
+        # Then drop them
+        for i in order:
+            if over <= 0:
+                break
+            if kept[i]:
+                over -= sizes[i]
+                kept[i], sizes[i] = "", 0
+
+        after = sum(sizes)
+        dropped = sum(1 for text in kept if not text) - sum(1 for text in texts if not text)
+        record_tokens_saved(before - after)
+        logger.info(
+            "Packed %d segments into %d tokens (budget %d, %d saved, %d dropped)",
+            len(segments), after, self.budget, before - after, dropped,
+        )
+        return kept
@@ -0,0 +1,334 @@
+"""
+Per-node tracing for the research graph.
+
+`DoTACotGraph` wraps every node with `traced`. While a node runs, its
+`NodeRecorder` sits in a context variable, so anything it awaits can report to
+it without being passed around:
+
+- `track_call(kind)` times a wait on an external service (vector query,
+  embedding, rerank);
+- `UsageHandler`, attached to every LangChain run through a configure hook,
+  times each chat model call and records prompt / completion tokens and the
+  estimated cost (cache hits are counted separately and cost nothing);
+- `record_tokens_saved(n)` counts prompt tokens removed by context packing
+  (see utils.token_budget).
+
+Each finished node appends one entry to the run's `trace` state key (step
+subgraph entries are bubbled up by `execute_step`) and to the process-wide
+metrics, which are rendered in the Prometheus text format.
+
+    python -m backend.utils.tracing "What are the risks of PRINCIPAL FI fund?" --json trace.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+
+# USD per 1M (prompt, completion) tokens; override or extend with LLM_PRICES='{"model": [in, out]}'
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "o3-mini": (1.10, 4.40),
+}
+
+
+class NodeRecorder:
+    def __init__(self, node: str, step: Optional[int] = None):
+        self.node = node
+        self.step = step
+        self.calls: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "wait": 0.0})
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.tokens_saved = 0
+        self.started_at = time.time()
+
+    def add_call(self, kind: str, wait: float):
+        self.calls[kind]["count"] += 1
+        self.calls[kind]["wait"] += wait
+
+    def entry(self, wall: float) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4().hex,
+            "node": self.node,
+            "step": self.step,
+            "started_at": self.started_at,
+            "wall": wall,
+            "calls": {kind: dict(call) for kind, call in self.calls.items()},
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": self.cost,
+            "tokens_saved": self.tokens_saved,
+        }
+
+
+_current: ContextVar[Optional[NodeRecorder]] = ContextVar("dota_node_recorder", default=None)
+
+
+@contextmanager
+def track_call(kind: str):
+    """
+    Count the enclosed block as a wait on an external service of the running node.
+    """
+    recorder = _current.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if recorder is not None:
+            recorder.add_call(kind, time.perf_counter() - started)
+
+
+def record_tokens_saved(tokens: int):
+    recorder = _current.get()
+    if recorder is not None:
+        recorder.tokens_saved += tokens
+
+
+def load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    prices.update({model: tuple(price) for model, price in json.loads(os.environ.get("LLM_PRICES", "{}")).items()})
+    return prices
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, prices=None) -> float:
+    prices = prices or DEFAULT_PRICES
+    # Longest prefix wins, so dated model names ("gpt-4o-2024-08-06") and "-mini" variants resolve
+    for name in sorted(prices, key=len, reverse=True):
+        if model and model.startswith(name):
+            prompt_price, completion_price = prices[name]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return 0.0
+
+
+class UsageHandler(BaseCallbackHandler):
+    """
+    Times every chat model call and attributes its tokens and cost to the node that made it.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self.prices = load_prices()
+        self._runs: Dict[uuid.UUID, Tuple[NodeRecorder, str, float]] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        recorder = _current.get()
+        if recorder is not None:
+            model = (metadata or {}).get("ls_model_name", "")
+            self._runs[run_id] = (recorder, model, time.perf_counter())
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        recorder, model, started = run
+        prompt_tokens = completion_tokens = 0
+        cached = False
+        # n > 1 choices come from one request and each carry its total usage, so read the first
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        if message is not None:
+            cached = message.response_metadata.get("cache_hit", False)
+            usage = message.usage_metadata or {}
+            prompt_tokens = usage.get("input_tokens", 0)
+            completion_tokens = usage.get("output_tokens", 0)
+            model = model or message.response_metadata.get("model_name", "")
+        if not prompt_tokens and response.llm_output:
+            usage = response.llm_output.get("token_usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
+
+        recorder.add_call("llm_cache" if cached else "llm", time.perf_counter() - started)
+        if not cached:
+            recorder.prompt_tokens += prompt_tokens
+            recorder.completion_tokens += completion_tokens
+            recorder.cost += estimate_cost(model, prompt_tokens, completion_tokens, self.prices)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            recorder, _, started = run
+            recorder.add_call("llm", time.perf_counter() - started)
+
+
+_usage_handler: ContextVar[Optional[UsageHandler]] = ContextVar("dota_usage_handler", default=None)
+register_configure_hook(_usage_handler, inheritable=True)
+_USAGE = UsageHandler()
+
+
+class Metrics:
+    """
+    Process-wide counters per node, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.nodes: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.waits: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, entry: Dict[str, Any]):
+        with self._lock:
+            node = self.nodes[entry["node"]]
+            node["runs"] += 1
+            node["seconds"] += entry["wall"]
+            node["prompt_tokens"] += entry["prompt_tokens"]
+            node["completion_tokens"] += entry["completion_tokens"]
+            node["cost"] += entry["cost"]
+            node["tokens_saved"] += entry.get("tokens_saved", 0)
+            for kind, call in entry["calls"].items():
+                wait = self.waits[(entry["node"], kind)]
+                wait["count"] += call["count"]
+                wait["seconds"] += call["wait"]
+
+    def prometheus(self) -> str:
+        series = [
+            ("dota_node_runs_total", "counter", "Node executions", "runs"),
+            ("dota_node_seconds_total", "counter", "Wall time spent in the node", "seconds"),
+            ("dota_node_prompt_tokens_total", "counter", "LLM prompt tokens", "prompt_tokens"),
+            ("dota_node_completion_tokens_total", "counter", "LLM completion tokens", "completion_tokens"),
+            ("dota_node_cost_usd_total", "counter", "Estimated LLM cost in USD", "cost"),
+            ("dota_node_tokens_saved_total", "counter", "Prompt tokens removed by context packing", "tokens_saved"),
+        ]
+        lines = []
+        with self._lock:
+            for name, kind, help_text, field in series:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                lines += [f'{name}{{node="{node}"}} {values[field]:.6g}' for node, values in sorted(self.nodes.items())]
+            for name, help_text, field in [
+                ("dota_external_calls_total", "External calls made by the node", "count"),
+                ("dota_external_wait_seconds_total", "Time the node waited on external calls", "seconds"),
+            ]:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                lines += [
+                    f'{name}{{node="{node}",kind="{kind}"}} {values[field]:.6g}'
+                    for (node, kind), values in sorted(self.waits.items())
+                ]
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    return _metrics
+
+
+def to_prometheus(trace: List[Dict[str, Any]]) -> str:
+    metrics = Metrics()
+    for entry in trace:
+        metrics.observe(entry)
+    return metrics.prometheus()
+
+
+def traced(node: str, fn: Callable, step_node: bool = False) -> Callable:
+    """
+    Wrap an async graph node so each run adds its trace entry to the returned state.
+
+    `functools.wraps` keeps the node's state annotation, which LangGraph uses as its input schema.
+    """
+    @functools.wraps(fn)
+    async def run(state, *args, **kwargs):
+        recorder = NodeRecorder(node, state.get("current_step") if step_node else None)
+        recorder_token = _current.set(recorder)
+        usage_token = _usage_handler.set(_USAGE)
+        started = time.perf_counter()
+        try:
+            result = await fn(state, *args, **kwargs)
+        finally:
+            _usage_handler.reset(usage_token)
+            _current.reset(recorder_token)
+        entry = recorder.entry(time.perf_counter() - started)
+        _metrics.observe(entry)
+        result["trace"] = list(result.get("trace") or []) + [entry]
+        return result
+
+    return run
+
+
+def summarize(trace: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-node totals of a run's trace, in first-seen order.
+    """
+    nodes: Dict[str, Dict[str, Any]] = {}
+    for entry in sorted(trace, key=lambda e: e["started_at"]):
+        node = nodes.setdefault(entry["node"], {
+            "runs": 0, "wall": 0.0, "wait": 0.0, "calls": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "tokens_saved": 0,
+        })
+        node["runs"] += 1
+        node["wall"] += entry["wall"]
+        node["wait"] += sum(call["wait"] for call in entry["calls"].values())
+        node["calls"] += sum(call["count"] for call in entry["calls"].values())
+        node["prompt_tokens"] += entry["prompt_tokens"]
+        node["completion_tokens"] += entry["completion_tokens"]
+        node["cost"] += entry["cost"]
+        node["tokens_saved"] += entry.get("tokens_saved", 0)
+    return nodes
+
+
+def print_breakdown(trace: List[Dict[str, Any]], elapsed: float = None):
+    print(f"{'node':<20}{'runs':>5}{'wall s':>9}{'wait s':>9}{'calls':>7}{'prompt':>9}{'compl':>8}{'cost $':>10}{'saved':>8}")
+    nodes = summarize(trace)
+    for name, node in nodes.items():
+        print(
+            f"{name:<20}{node['runs']:>5}{node['wall']:>9.2f}{node['wait']:>9.2f}{node['calls']:>7}"
+            f"{node['prompt_tokens']:>9}{node['completion_tokens']:>8}{node['cost']:>10.4f}{node['tokens_saved']:>8}"
+        )
+    tokens = sum(n["prompt_tokens"] + n["completion_tokens"] for n in nodes.values())
+    cost = sum(n["cost"] for n in nodes.values())
+    saved = sum(n["tokens_saved"] for n in nodes.values())
+    wall = f" in {elapsed:.1f}s" if elapsed is not None else ""
+    # execute_step contains the step nodes, so its wall time overlaps theirs
+    print(
+        f"🧾 {tokens} tokens, ${cost:.4f} estimated, {saved} prompt tokens saved by packing{wall} "
+        f"(execute_step wall time includes its step nodes)"
+    )
+
+
+async def trace_query(query: str) -> Tuple[Dict[str, Any], float]:
+    from ..graph import get_graph
+
+    graph = get_graph()
+    started = time.perf_counter()
+    summary_state = {}
+    async for update in graph.run({"configurable": {"thread_id": "trace"}}, query=query):
+        summary_state = update.get("summary", summary_state)
+    return summary_state, time.perf_counter() - started
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run one query and print where its time, tokens and cost went.")
+    parser.add_argument("query")
+    parser.add_argument("--json", dest="json_path", help="Write the raw trace to this file")
+    parser.add_argument("--prometheus", action="store_true", help="Also print the trace as Prometheus metrics")
+    args = parser.parse_args()
+
+    summary_state, elapsed = asyncio.run(trace_query(args.query))
+    trace = summary_state.get("trace", [])
+    print(summary_state.get("final_summary", ""))
+    print()
+    print_breakdown(trace, elapsed)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False, indent=2)
+        print(f"📁 Trace written to {args.json_path}")
+    if args.prometheus:
+        print(to_prometheus(trace))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import threading
+
+from .base import VectorStore
+from .local_store import LocalVectorStore
+from .pinecone_store import PineconeVectorStore
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(name: str, backend: str = None) -> VectorStore:
+    """
+    Process-wide vector store for an index name.
+
+    VECTOR_BACKEND selects "pinecone" (default) or "local"; the local backend
+    keeps its files under LOCAL_VECTOR_DIR (default vector_store/).
+    """
+    backend = backend or os.environ.get("VECTOR_BACKEND", "pinecone")
+    with _stores_lock:
+        if (backend, name) not in _stores:
+            if backend == "local":
+                store = LocalVectorStore(name, root=os.environ.get("LOCAL_VECTOR_DIR", "vector_store"))
+            elif backend == "pinecone":
+                store = PineconeVectorStore(name)
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
+            _stores[(backend, name)] = store
+        return _stores[(backend, name)]
+
+
+__all__ = ["VectorStore", "LocalVectorStore", "PineconeVectorStore", "get_vector_store"]
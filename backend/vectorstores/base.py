@@ -0,0 +1,49 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Sequence, Tuple
+
+from ..utils.tracing import track_call
+
+# Bounded pool for blocking vector queries, shared by every store in the process
+_QUERY_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("SEARCH_MAX_WORKERS", "8")),
+    thread_name_prefix="vector-query",
+)
+
+# (id, values, metadata), the tuple format Pinecone's upsert already takes
+VectorRecord = Tuple[str, Sequence[float], Dict[str, Any]]
+
+
+class VectorStore:
+    """
+    Minimal vector index interface used by SearchNode and the ingestion scripts.
+
+    `query` returns matches as {"id": ..., "score": ..., "metadata": {...}}, best first.
+    """
+
+    name: str
+
+    def create_if_missing(self, dimension: int):
+        raise NotImplementedError
+
+    def query(self, vector: Sequence[float], top_k: int = 100) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def upsert(self, vectors: Sequence[VectorRecord]):
+        raise NotImplementedError
+
+    def delete(self, ids: Sequence[str]):
+        raise NotImplementedError
+
+    async def aquery(self, vector: Sequence[float], top_k: int = 100) -> List[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        with track_call("vector"):
+            return await loop.run_in_executor(_QUERY_EXECUTOR, partial(self.query, vector, top_k))
+
+    async def aupsert(self, vectors: Sequence[VectorRecord]):
+        return await asyncio.to_thread(self.upsert, vectors)
+
+    async def adelete(self, ids: Sequence[str]):
+        return await asyncio.to_thread(self.delete, ids)
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from .base import VectorRecord, VectorStore
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Offline vector index: a memory-mapped float32 matrix plus a SQLite side store.
+
+    <root>/<name>/vectors.f32  row-major matrix of unit-normalized vectors
+    <root>/<name>/meta.sqlite  id -> row and metadata JSON
+    <root>/<name>/info.json    dimension and allocated capacity
+
+    Queries are one vectorized matrix product over the live rows (cosine similarity).
+    """
+
+    def __init__(self, name: str, root: str = "vector_store", initial_capacity: int = 1024):
+        self.name = name
+        self.path = Path(root) / name
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(self.path / "meta.sqlite", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (id TEXT PRIMARY KEY, row INTEGER UNIQUE NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.dimension = None
+        self.capacity = 0
+        self._matrix = None
+        info_path = self.path / "info.json"
+        if info_path.exists():
+            info = json.loads(info_path.read_text())
+            self._open(info["dimension"], info["capacity"])
+
+        rows = self._conn.execute("SELECT id, row FROM vectors").fetchall()
+        self._row_of = {vec_id: row for vec_id, row in rows}
+        self._size = max(self._row_of.values(), default=-1) + 1
+        self._alive = np.zeros(max(self.capacity, 1), dtype=bool)
+        for row in self._row_of.values():
+            self._alive[row] = True
+        self._free_rows = [row for row in range(self._size) if not self._alive[row]]
+
+    def _open(self, dimension: int, capacity: int):
+        vectors_path = self.path / "vectors.f32"
+        needed = dimension * capacity * np.dtype(np.float32).itemsize
+        if not vectors_path.exists() or vectors_path.stat().st_size < needed:
+            with open(vectors_path, "ab") as f:
+                f.truncate(needed)
+        self.dimension = dimension
+        self.capacity = capacity
+        self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, dimension))
+        (self.path / "info.json").write_text(json.dumps({"dimension": dimension, "capacity": capacity}))
+
+    def _grow(self, rows_needed: int):
+        capacity = max(self.capacity, self.initial_capacity)
+        while capacity < rows_needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._open(self.dimension, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive[:capacity]
+        self._alive = alive
+
+    def create_if_missing(self, dimension: int):
+        with self._lock:
+            if self.dimension is None:
+                self._open(dimension, self.initial_capacity)
+                self._alive = np.zeros(self.capacity, dtype=bool)
+            elif self.dimension != dimension:
+                raise ValueError(f"Index '{self.name}' has dimension {self.dimension}, not {dimension}")
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def query(self, vector: Sequence[float], top_k: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._matrix is None or not self._row_of:
+                return []
+            # Snapshot under the lock; the product itself runs without it
+            matrix, size, alive = self._matrix, self._size, self._alive[:self._size].copy()
+
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = matrix[:size] @ query
+        scores[~alive] = -np.inf
+
+        k = min(top_k, int(alive.sum()))
+        top_rows = np.argpartition(-scores, k - 1)[:k]
+        top_rows = top_rows[np.argsort(-scores[top_rows])]
+
+        with self._lock:
+            placeholders = ",".join("?" * len(top_rows))
+            found = {
+                row: (vec_id, json.loads(metadata))
+                for vec_id, row, metadata in self._conn.execute(
+                    f"SELECT id, row, metadata FROM vectors WHERE row IN ({placeholders})",
+                    [int(row) for row in top_rows],
+                )
+            }
+        return [
+            {"id": found[int(row)][0], "score": float(scores[row]), "metadata": found[int(row)][1]}
+            for row in top_rows
+            if int(row) in found
+        ]
+
+    def upsert(self, vectors: Sequence[VectorRecord]):
+        if not vectors:
+            return
+        values = np.asarray([record[1] for record in vectors], dtype=np.float32)
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values /= np.where(norms == 0, 1.0, norms)
+
+        with self._lock:
+            self.create_if_missing(values.shape[1])
+            rows = []
+            for vec_id, _, _ in vectors:
+                row = self._row_of.get(vec_id)
+                if row is None:
+                    row = self._free_rows.pop() if self._free_rows else self._size
+                    self._size = max(self._size, row + 1)
+                    self._row_of[vec_id] = row
+                rows.append(row)
+            self._grow(self._size)
+
+            self._matrix[rows] = values
+            self._matrix.flush()
+            self._alive[rows] = True
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO vectors (id, row, metadata) VALUES (?, ?, ?)",
+                [
+                    (vec_id, row, json.dumps(metadata, ensure_ascii=False))
+                    for (vec_id, _, metadata), row in zip(vectors, rows)
+                ],
+            )
+            self._conn.commit()
+
+    def delete(self, ids: Sequence[str]):
+        with self._lock:
+            rows = [self._row_of.pop(vec_id) for vec_id in ids if vec_id in self._row_of]
+            if not rows:
+                return
+            self._alive[rows] = False
+            self._free_rows.extend(rows)
+            self._conn.executemany("DELETE FROM vectors WHERE row = ?", [(row,) for row in rows])
+            self._conn.commit()
@@ -0,0 +1,52 @@
+import os
+from typing import Any, Dict, List, Sequence
+
+from .base import VectorRecord, VectorStore
+
+
+class PineconeVectorStore(VectorStore):
+    def __init__(self, name: str, api_key: str = None):
+        from pinecone import Pinecone as PineconeClient
+
+        self.name = name
+        self.client = PineconeClient(api_key=api_key or os.environ["PINECONE_API_KEY"])
+        self._index = None
+
+    @property
+    def index(self):
+        # Resolving an index handle is a network call, so only do it on first use
+        if self._index is None:
+            self._index = self.client.Index(self.name)
+        return self._index
+
+    def create_if_missing(self, dimension: int):
+        from pinecone import ServerlessSpec
+
+        if self.name not in self.client.list_indexes().names():
+            self.client.create_index(
+                name=self.name,
+                dimension=dimension,
+                metric="cosine",
+                spec=ServerlessSpec(cloud="aws", region="us-east-1"),
+            )
+
+    def query(self, vector: Sequence[float], top_k: int = 100) -> List[Dict[str, Any]]:
+        response = self.index.query(
+            vector=list(vector),
+            top_k=top_k,
+            include_metadata=True,
+            include_values=False
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+            for match in response.get("matches", [])
+        ]
+
+    def upsert(self, vectors: Sequence[VectorRecord]):
+        self.index.upsert(vectors=[(vec_id, list(values), metadata) for vec_id, values, metadata in vectors])
+
+    def delete(self, ids: Sequence[str]):
+        ids = list(ids)
+        # Pinecone caps deletes at 1000 ids per request
+        for start in range(0, len(ids), 1000):
+            self.index.delete(ids=ids[start:start + 1000])
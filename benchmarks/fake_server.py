@@ -0,0 +1,61 @@
+"""
+Serve application.py on the real graph with every external service simulated,
+so load tests need no network, API keys or paid backends.
+
+The graph's nodes run as in production; the OpenAI, Cohere, embedding and
+vector index clients are replaced by the deterministic fakes in fakes.py.
+RerankNode still needs the NLTK `punkt` data, as in production.
+
+    python benchmarks/fake_server.py --port 8000 --plan-size 3
+    python benchmarks/load_test.py --url http://localhost:8000 --jobs 200 --concurrency 50
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for key in ("OPENAI_API_KEY", "COHERE_API_KEY", "PINECONE_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+from application import create_app
+from backend.graph import DoTACotGraph
+from benchmarks.fakes import FakeProfile, Latency, install_fakes
+
+
+def create_fake_app(profile: FakeProfile = None):
+    """
+    The server app on a graph of its own, wired to the fakes from `profile`.
+    """
+    graph = install_fakes(DoTACotGraph(), profile or FakeProfile())
+    return create_app(graph=graph)
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the research API against simulated services.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--plan-size", type=int, default=3)
+    parser.add_argument("--llm", type=Latency.parse, default=Latency(0.8, 0.4), help="median[:sigma] seconds")
+    parser.add_argument("--embedding", type=Latency.parse, default=Latency(0.05, 0.3))
+    parser.add_argument("--vector", type=Latency.parse, default=Latency(0.08, 0.3))
+    parser.add_argument("--rerank", type=Latency.parse, default=Latency(0.2, 0.3))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every simulated latency")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    profile = FakeProfile(
+        plan_size=args.plan_size, llm=args.llm, embedding=args.embedding,
+        vector=args.vector, rerank=args.rerank, seed=args.seed,
+    ).scaled(args.scale)
+    print(f"🧪 Serving the research API with simulated backends (plan size {args.plan_size})")
+    uvicorn.run(create_fake_app(profile), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Deterministic stand-ins for the graph's external services, for offline benchmarks.
+
+Every fake sleeps for a latency drawn from a `Latency` distribution and answers
+from a hash of its input, so a run needs no network, produces the same
+responses and latencies every time, and still exercises the real node code
+(prompt building, JSON plan parsing, BM25, streaming).
+
+    graph = DoTACotGraph()
+    install_fakes(graph, FakeProfile(plan_size=3))
+"""
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import ConfigDict
+
+from backend.vectorstores import VectorStore
+
+WORDS = (
+    "fund equity bond yield inflation policy rate growth risk return sharpe drawdown "
+    "allocation dividend outlook sector baht market volatility liquidity duration"
+).split()
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+def _rng(*parts: Any) -> random.Random:
+    return random.Random(_digest(*parts))
+
+
+def _text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(str(getattr(m, "content", m)) for m in prompt)
+
+
+@dataclass
+class Latency:
+    """
+    Log-normal latency: `median` seconds, `sigma` spread (0 = constant).
+    """
+    median: float = 0.0
+    sigma: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """ "0.8" or "0.8:0.4" (median:sigma). """
+        median, _, sigma = spec.partition(":")
+        return cls(float(median), float(sigma or 0))
+
+    def scaled(self, factor: float) -> "Latency":
+        return Latency(self.median * factor, self.sigma)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(self.sigma * rng.gauss(0, 1))
+
+
+@dataclass
+class FakeProfile:
+    plan_size: int = 3
+    llm: Latency = field(default_factory=lambda: Latency(0.8, 0.4))
+    embedding: Latency = field(default_factory=lambda: Latency(0.05, 0.3))
+    vector: Latency = field(default_factory=lambda: Latency(0.08, 0.3))
+    rerank: Latency = field(default_factory=lambda: Latency(0.2, 0.3))
+    answer_words: int = 60
+    seed: int = 0
+
+    def scaled(self, factor: float) -> "FakeProfile":
+        return FakeProfile(
+            plan_size=self.plan_size,
+            llm=self.llm.scaled(factor),
+            embedding=self.embedding.scaled(factor),
+            vector=self.vector.scaled(factor),
+            rerank=self.rerank.scaled(factor),
+            answer_words=self.answer_words,
+            seed=self.seed,
+        )
+
+
+def fake_plan(size: int) -> List[Dict[str, Any]]:
+    """
+    `size` independent research steps; with more than two, the last one combines the others.
+    """
+    steps = [
+        {"step": f"research topic {i + 1}", "intent": "economy" if i % 2 else "fund", "depends_on": []}
+        for i in range(max(1, size))
+    ]
+    if size > 2:
+        steps[-1] = {"step": "combine findings", "intent": "fund", "depends_on": list(range(size - 1))}
+    return steps
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model answering from the prompt: a JSON plan for the planner, a namespace
+    for the classifier and deterministic prose for everything else. Streams word by word.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    latency: Latency = Latency()
+    model: str = "gpt-4o"
+    plan_size: int = 3
+    answer_words: int = 60
+    seed: int = 0
+    n: int = 1
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, prompt: str, choice: int = 0) -> str:
+        if "reasoning planner" in prompt:
+            return json.dumps(fake_plan(self.plan_size))
+        if "classification assistant" in prompt:
+            return _rng(self.seed, prompt, choice).choice(["fund", "fund", "economy"])
+        rng = _rng(self.seed, prompt)
+        return " ".join(rng.choice(WORDS) for _ in range(self.answer_words))
+
+    def _delay(self, prompt: str, choice: int = 0) -> float:
+        return self.latency.sample(_rng(self.seed, "latency", prompt, choice))
+
+    @staticmethod
+    def _usage(prompt: str, replies: List[str]) -> Dict[str, int]:
+        # Word counts stand in for tokens, so the tracing cost estimates have something to add up
+        input_tokens, output_tokens = len(prompt.split()), sum(len(reply.split()) for reply in replies)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _result(self, prompt: str) -> ChatResult:
+        replies = [self._reply(prompt, i) for i in range(self.n)]
+        usage = self._usage(prompt, replies)
+        return ChatResult(generations=[
+            ChatGeneration(message=AIMessage(content=reply, usage_metadata=usage)) for reply in replies
+        ])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        prompt = _text(messages)
+        time.sleep(self._delay(prompt))
+        return self._result(prompt)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs) -> ChatResult:
+        prompt = _text(messages)
+        await asyncio.sleep(self._delay(prompt))
+        return self._result(prompt)
+
+    def _chunks(self, prompt: str) -> Iterator[tuple]:
+        """
+        (seconds to wait, chunk): a third of the latency before the first word, the rest spread over
+        the answer, then usage as a final empty chunk, as with ChatOpenAI(stream_usage=True).
+        """
+        words = self._reply(prompt).split(" ")
+        delay = self._delay(prompt)
+        for i, word in enumerate(words):
+            wait = delay * 2 / 3 / len(words) if i else delay / 3
+            yield wait, ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+        usage = self._usage(prompt, [" ".join(words)])
+        yield 0.0, ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for wait, chunk in self._chunks(_text(messages)):
+            time.sleep(wait)
+            if run_manager and chunk.text:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        for wait, chunk in self._chunks(_text(messages)):
+            await asyncio.sleep(wait)
+            if run_manager and chunk.text:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, latency: Latency, dimension: int = 64, seed: int = 0):
+        self.latency = latency
+        self.dimension = dimension
+        self.seed = seed
+
+    def _vector(self, text: str) -> List[float]:
+        rng = _rng(self.seed, "embedding", text)
+        vector = [rng.gauss(0, 1) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency.sample(_rng(self.seed, "latency", *texts)))
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency.sample(_rng(self.seed, "latency", *texts)))
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class FakeVectorStore(VectorStore):
+    """
+    Read-only index returning `top_k` synthetic documents for any vector. `query`
+    blocks like the Pinecone client, so `aquery` goes through the shared thread pool.
+    """
+
+    def __init__(self, name: str, latency: Latency, seed: int = 0):
+        self.name = name
+        self.latency = latency
+        self.seed = seed
+
+    def query(self, vector: Sequence[float], top_k: int = 100) -> List[Dict[str, Any]]:
+        key = _digest(self.seed, self.name, [round(v, 4) for v in vector[:8]])
+        rng = _rng(key)
+        time.sleep(self.latency.sample(rng))
+        matches = []
+        for i in range(top_k):
+            content = " ".join(rng.choice(WORDS) for _ in range(40))
+            matches.append({
+                "id": f"{self.name}-{key[:8]}-{i}",
+                "score": round(1.0 - i / (top_k + 1), 4),
+                "metadata": {
+                    "page_content": content,
+                    "source_name": f"{self.name} document {i}",
+                    "source_url": f"https://example.invalid/{self.name}/{key[:8]}/{i}",
+                    "source_type": "benchmark",
+                },
+            })
+        return matches
+
+    def create_if_missing(self, dimension: int):
+        pass
+
+    def upsert(self, vectors):
+        pass
+
+    def delete(self, ids):
+        pass
+
+
+class FakeRerankClient:
+    """
+    Async stand-in for `cohere.AsyncClient.rerank`.
+    """
+
+    def __init__(self, latency: Latency, seed: int = 0):
+        self.latency = latency
+        self.seed = seed
+
+    async def rerank(self, model: str, query: str, documents: List[str], top_n: int, **kwargs):
+        rng = _rng(self.seed, "rerank", query, len(documents))
+        await asyncio.sleep(self.latency.sample(rng))
+        scores = sorted(((rng.random(), i) for i in range(len(documents))), reverse=True)[:top_n]
+        return SimpleNamespace(results=[SimpleNamespace(index=i, relevance_score=score) for score, i in scores])
+
+
+def install_fakes(graph, profile: FakeProfile):
+    """
+    Replace every external client used by the graph's nodes with a fake from `profile`.
+    """
+    def chat(replaced, **overrides):
+        return FakeChatModel(
+            latency=profile.llm, model=getattr(replaced, "model_name", "gpt-4o"), plan_size=profile.plan_size,
+            answer_words=profile.answer_words, seed=profile.seed, **overrides,
+        )
+
+    for node in (graph.planner, graph.cot_executor, graph.rewrite_query, graph.expansion,
+                 graph.predict_namespace, graph.rerank_summary, graph.generate, graph.summary):
+        node.llm = chat(node.llm)
+    graph.predict_namespace.voter_llm = chat(graph.predict_namespace.voter_llm, n=graph.predict_namespace.votes)
+
+    embeddings = FakeEmbeddings(profile.embedding, seed=profile.seed)
+    graph.search.embedding = embeddings
+    # The centroid classifier depends on a locally built file; always take the LLM vote path
+    graph.predict_namespace.classifier = None
+    graph.predict_namespace.embedding = embeddings
+
+    graph.search.indexes = {
+        name: FakeVectorStore(name, profile.vector, seed=profile.seed) for name in graph.search.indexes
+    }
+    graph.rerank.client = FakeRerankClient(profile.rerank, seed=profile.seed)
+    return graph
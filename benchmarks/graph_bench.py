@@ -0,0 +1,162 @@
+"""
+Offline benchmark of the research graph across plan sizes and concurrency levels.
+
+Every external service is replaced by the deterministic fakes in fakes.py, so
+this runs on a laptop without network access or API keys. Per-node latency is
+collected with a callback handler on each run, so it measures the real node
+code plus the simulated service latency. RerankNode still needs the NLTK
+`punkt` data (python -m nltk.downloader punkt), as in production.
+
+    python benchmarks/graph_bench.py
+    python benchmarks/graph_bench.py --plan-sizes 1,3,6 --concurrency 1,8,32 --llm 0.8:0.4
+    python benchmarks/graph_bench.py --scale 0       # no simulated latency: pure graph overhead
+    python -m benchmarks.graph_bench --stream-tokens # also emit token events, as the server does
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for key in ("OPENAI_API_KEY", "COHERE_API_KEY", "PINECONE_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ["LLM_CACHE_ENABLED"] = "0"
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from backend.graph import DoTACotGraph
+from benchmarks.fakes import FakeProfile, Latency, install_fakes
+
+
+def _pct(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+class NodeTimer(BaseCallbackHandler):
+    """
+    Wall time of every graph node run (step subgraph nodes included), by node name.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._started: Dict[uuid.UUID, tuple] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def _finish(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started:
+            node, at = started
+            self.durations[node].append(time.perf_counter() - at)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+
+async def run_level(graph: DoTACotGraph, runs: int, concurrency: int, stream_tokens: bool = False) -> Dict[str, Any]:
+    timer = NodeTimer()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            summary = None
+            config = {"callbacks": [timer], "configurable": {"thread_id": f"bench-{index}"}}
+            async for update in graph.run(config, stream_tokens=stream_tokens,
+                                          query=f"benchmark question {index}", job_id=f"bench-{index}"):
+                summary = update.get("summary", summary)
+            if summary and summary.get("final_summary"):
+                latencies.append(time.perf_counter() - started)
+            else:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(runs)])
+    elapsed = time.perf_counter() - started
+    return {
+        "runs": runs,
+        "concurrency": concurrency,
+        "failures": failures,
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": _pct(latencies, 0.5),
+        "p95": _pct(latencies, 0.95),
+        "nodes": {
+            node: {"calls": len(times), "p50": _pct(times, 0.5), "p95": _pct(times, 0.95), "total": sum(times)}
+            for node, times in sorted(timer.durations.items())
+        },
+    }
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research graph against simulated services.")
+    parser.add_argument("--plan-sizes", type=_ints, default=[1, 3, 5])
+    parser.add_argument("--concurrency", type=_ints, default=[1, 4, 16])
+    parser.add_argument("--runs", type=int, default=None, help="Runs per level (default: 2 x concurrency, at least 4)")
+    parser.add_argument("--llm", type=Latency.parse, default=Latency(0.8, 0.4), help="median[:sigma] seconds")
+    parser.add_argument("--embedding", type=Latency.parse, default=Latency(0.05, 0.3))
+    parser.add_argument("--vector", type=Latency.parse, default=Latency(0.08, 0.3))
+    parser.add_argument("--rerank", type=Latency.parse, default=Latency(0.2, 0.3))
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every simulated latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream-tokens", action="store_true", help="Stream answer tokens, as the server does")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    graph = DoTACotGraph()
+    results = []
+    print(f"{'plan':>4}{'conc':>6}{'runs':>6}{'runs/s':>9}{'p50 s':>8}{'p95 s':>8}{'failed':>8}")
+    for plan_size in args.plan_sizes:
+        profile = FakeProfile(
+            plan_size=plan_size, llm=args.llm, embedding=args.embedding,
+            vector=args.vector, rerank=args.rerank, seed=args.seed,
+        ).scaled(args.scale)
+        install_fakes(graph, profile)
+        for concurrency in args.concurrency:
+            runs = args.runs or max(4, 2 * concurrency)
+            result = asyncio.run(run_level(graph, runs, concurrency, args.stream_tokens))
+            result["plan_size"] = plan_size
+            results.append(result)
+            print(
+                f"{plan_size:>4}{concurrency:>6}{runs:>6}{result['throughput']:>9.2f}"
+                f"{result['p50']:>8.2f}{result['p95']:>8.2f}{result['failures']:>8}"
+            )
+
+    print(f"\n⏱️  Per-node latency (plan size {results[-1]['plan_size']}, concurrency {results[-1]['concurrency']})")
+    print(f"{'node':<20}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'share':>8}")
+    nodes = results[-1]["nodes"]
+    # execute_step wraps the step nodes, so it is left out of the share denominator
+    total = sum(n["total"] for name, n in nodes.items() if name != "execute_step") or 1.0
+    for name, node in nodes.items():
+        share = f"{node['total'] / total:>7.0%}" if name != "execute_step" else f"{'-':>7}"
+        print(f"{name:<20}{node['calls']:>7}{node['p50'] * 1000:>9.1f}{node['p95'] * 1000:>9.1f} {share}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📁 Results in {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Load test for application.py: submit research jobs at a fixed concurrency,
+follow each one over SSE and report admission (202 / 429) and latency.
+
+    uvicorn application:app --port 8000
+    python benchmarks/load_test.py --url http://localhost:8000 --jobs 200 --concurrency 50
+
+To keep the external APIs (and their bills) out of the measurement, serve the
+same app with simulated backends instead of uvicorn application:app:
+
+    python benchmarks/fake_server.py --port 8000 --llm 0.8:0.4
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+async def _one(client: httpx.AsyncClient, index: int, results: dict):
+    started = time.perf_counter()
+    response = await client.post("/research", json={"query": f"load test query {index}"})
+    results["status"][response.status_code] += 1
+    if response.status_code != 202:
+        return
+    job_id = response.json()["job_id"]
+
+    first_token = None
+    async with client.stream("GET", f"/research/{job_id}/stream") as stream:
+        async for line in stream.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[5:])
+            if event["type"] == "token" and first_token is None:
+                first_token = time.perf_counter() - started
+            if event["type"] in ("done", "failed", "error"):
+                results["outcome"][event["type"]] += 1
+                break
+    results["latency"].append(time.perf_counter() - started)
+    if first_token is not None:
+        results["first_token"].append(first_token)
+
+
+async def run(url: str, jobs: int, concurrency: int):
+    results = {"status": Counter(), "outcome": Counter(), "latency": [], "first_token": []}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index):
+        async with semaphore:
+            try:
+                await _one(client, index, results)
+            except httpx.HTTPError as e:
+                results["status"][type(e).__name__] += 1
+
+    limits = httpx.Limits(max_connections=concurrency * 2)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*[limited(i) for i in range(jobs)])
+        elapsed = time.perf_counter() - started
+        health = (await client.get("/health")).json()
+
+    print(f"📨 {jobs} jobs at concurrency {concurrency} in {elapsed:.1f}s")
+    print(f"   responses: {dict(results['status'])}   outcomes: {dict(results['outcome'])}")
+    for label, values in [("end-to-end", results["latency"]), ("first token", results["first_token"])]:
+        if values:
+            print(
+                f"   {label:<12} p50 {_pct(values, 0.5):.2f}s  p95 {_pct(values, 0.95):.2f}s  "
+                f"mean {statistics.mean(values):.2f}s"
+            )
+    print(f"   completed {len(results['latency']) / elapsed:.2f} jobs/s")
+    print(f"🩺 {health}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the research server.")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--jobs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.jobs, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
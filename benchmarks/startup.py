@@ -0,0 +1,59 @@
+"""
+Per-request setup cost of the research graph: a new DoTACotGraph built and
+compiled for every query (what app.py used to do) versus the shared graph from
+`get_graph()`, where a request only creates its input state.
+
+No API calls are made (clients are only constructed), so placeholder keys are
+enough:
+
+    python benchmarks/startup.py --requests 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for key in ("OPENAI_API_KEY", "COHERE_API_KEY", "PINECONE_API_KEY"):
+    os.environ.setdefault(key, "benchmark")
+
+from backend.graph import DoTACotGraph, get_graph
+
+
+def _timed(fn, repeat: int):
+    times = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request graph setup with the shared compiled graph.")
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    graph = get_graph()
+    first = time.perf_counter() - started
+
+    per_request = _timed(lambda i: DoTACotGraph(query=f"query {i}").compile(), args.requests)
+    shared = _timed(lambda i: (get_graph().compile(), graph.input_for(f"query {i}", job_id=str(i))), args.requests)
+
+    print(f"🚀 Shared graph built and compiled once in {first * 1000:.1f} ms")
+    print(f"{'setup per request':<26}{'mean ms':>10}{'p50 ms':>10}{'max ms':>10}")
+    for label, times in [("new graph + compile", per_request), ("get_graph()", shared)]:
+        print(
+            f"{label:<26}{statistics.mean(times) * 1000:>10.2f}"
+            f"{statistics.median(times) * 1000:>10.2f}{max(times) * 1000:>10.2f}"
+        )
+    saved = (statistics.mean(per_request) - statistics.mean(shared)) * args.requests
+    print(f"✅ {saved:.2f}s of setup saved over {args.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # langgraph_entry.py
-from backend.graph import DoTACotGraph
+from backend.graph import get_graph
 
-graph = DoTACotGraph().compile()
+graph = get_graph().compile()
 
 graph_workflow =  graph.get_graph().draw_mermaid_png()
 
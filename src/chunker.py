@@ -0,0 +1,344 @@
+"""
+Token-aware chunker for Typhoon OCR output (mixed Thai/English markdown and HTML tables).
+
+Chunks are measured in embedding-model tokens rather than characters, so Thai
+and English pages produce evenly sized chunks. Markdown/HTML tables, headings
+and paragraphs are kept whole where they fit; an oversized table is split by
+rows with its header repeated, and only text split mid-paragraph carries an
+overlap.
+
+    python src/chunker.py bench rag_outputs/ocr_only rag_outputs/econ_ocr_only
+"""
+import argparse
+import concurrent.futures
+import os
+import re
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.utils.token_budget import get_encoding
+
+_HTML_TABLE = re.compile(r"<table\b.*?</table>", re.IGNORECASE | re.DOTALL)
+_HTML_ROW = re.compile(r"<tr\b.*?</tr>", re.IGNORECASE | re.DOTALL)
+_SENTENCE_END = re.compile(r"(?<=[.!?;:。])\s+|\n+")
+# No cl100k token is longer than this many characters in practice; bounds how much text one cut encodes
+_MAX_CHARS_PER_TOKEN = 16
+
+
+class TokenChunker:
+    """
+    Drop-in for RecursiveCharacterTextSplitter.split_text, sized in tokens.
+    """
+
+    def __init__(self, chunk_tokens: int = 400, overlap_tokens: int = 40, encoding_name: str = "cl100k_base"):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError(f"overlap_tokens ({overlap_tokens}) must be smaller than chunk_tokens ({chunk_tokens})")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.encoding_name = encoding_name
+        self._encoding = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            chunk_tokens=int(os.environ.get("CHUNK_TOKENS", 400)),
+            overlap_tokens=int(os.environ.get("CHUNK_OVERLAP_TOKENS", 40)),
+        )
+
+    def __getstate__(self):
+        # The encoding is loaded lazily in each worker process
+        return {**self.__dict__, "_encoding": None}
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            # Falls back to approximate counts like the prompt budgets when tiktoken cannot load its BPE file
+            self._encoding = get_encoding(self.encoding_name)
+        return self._encoding
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _count_capped(self, text: str, cap: int) -> int:
+        """
+        Exact count up to `cap`; anything longer than `cap` tokens can be reported as cap + 1 without encoding it all.
+        """
+        if len(text) > cap * _MAX_CHARS_PER_TOKEN:
+            return cap + 1
+        return self.count(text)
+
+    # --- structure ---
+
+    @staticmethod
+    def blocks(text: str) -> List[Tuple[str, str]]:
+        """
+        (kind, text) blocks in order: "table" (markdown or HTML), "heading" or "text" paragraphs.
+        """
+        blocks = []
+        position = 0
+        for match in _HTML_TABLE.finditer(text):
+            blocks.extend(TokenChunker._markdown_blocks(text[position:match.start()]))
+            blocks.append(("table", match.group(0)))
+            position = match.end()
+        blocks.extend(TokenChunker._markdown_blocks(text[position:]))
+        return blocks
+
+    @staticmethod
+    def _markdown_blocks(text: str) -> List[Tuple[str, str]]:
+        blocks, paragraph, table = [], [], []
+
+        def flush():
+            if paragraph:
+                blocks.append(("text", "\n".join(paragraph)))
+                paragraph.clear()
+            if table:
+                blocks.append(("table", "\n".join(table)))
+                table.clear()
+
+        for line in text.splitlines():
+            stripped = line.strip()
+            if stripped.startswith("|"):
+                if paragraph:
+                    flush()
+                table.append(line)
+            elif not stripped:
+                flush()
+            elif stripped.startswith("#"):
+                flush()
+                blocks.append(("heading", stripped))
+            else:
+                if table:
+                    flush()
+                paragraph.append(line)
+        flush()
+        return blocks
+
+    # --- oversized blocks ---
+
+    def _split_table(self, table: str, budget: int) -> List[str]:
+        """
+        Split a table by rows, repeating its header in every piece.
+        """
+        if table.lstrip().lower().startswith("<table"):
+            rows = _HTML_ROW.findall(table)
+            if not rows:
+                return self._split_text(table, budget, overlap=False)
+            header, rows = rows[0], rows[1:]
+            wrap = lambda body: f"<table>{header}{''.join(body)}</table>"
+        else:
+            lines = table.splitlines()
+            # Header row plus the |---| separator
+            cut = 2 if len(lines) > 1 and set(lines[1].replace("|", "").strip()) <= set("-: ") else 1
+            header, rows = "\n".join(lines[:cut]), lines[cut:]
+            wrap = lambda body: "\n".join([header, *body])
+
+        # Every piece carries the header and the wrapper (<table>...</table>); token counts are summed
+        # per row (+1 for the joining newline), an upper bound for the joined text
+        header_tokens = self.count(wrap([])) + 2
+        pieces, current, current_tokens = [], [], header_tokens
+        for row in rows:
+            row_tokens = self.count(row) + 1
+            if current and current_tokens + row_tokens > budget:
+                pieces.append(wrap(current))
+                current, current_tokens = [], header_tokens
+            if not current and current_tokens + row_tokens > budget:
+                pieces.extend(self._split_text(row, budget, overlap=False))
+                continue
+            current.append(row)
+            current_tokens += row_tokens
+        if current or not pieces:
+            pieces.append(wrap(current))
+        return pieces
+
+    def _fit(self, text: str, budget: int) -> int:
+        """
+        Longest character prefix of `text` within `budget` tokens, preferring a whitespace boundary.
+        """
+        window = text[:budget * _MAX_CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(window, disallowed_special=())
+        if len(tokens) <= budget:
+            return len(window)
+        # The cut can fall inside a multi-byte Thai character; drop the partial bytes
+        end = max(1, len(self.encoding.decode(tokens[:budget]).rstrip("\ufffd")))
+        space = text.rfind(" ", 0, end)
+        return space + 1 if space > end // 2 else end
+
+    def _split_text(self, text: str, budget: int, overlap: bool = True) -> List[str]:
+        """
+        Pack sentences/lines into pieces of at most `budget` tokens, cutting unbroken Thai runs by token
+        budget; pieces after the first start with the last `overlap_tokens` of the previous one.
+        """
+        overlap = overlap and self.overlap_tokens > 0
+        if overlap:
+            # Leave room for the overlap prepended to every piece but the first
+            budget -= self.overlap_tokens
+        units = [unit.strip() for unit in _SENTENCE_END.split(text) if unit.strip()]
+
+        # (piece, whether it was cut mid-run from the previous piece, so no separator is added back).
+        # Counts are summed per unit (+1 per joining space), an upper bound for the joined text.
+        pieces, current, current_tokens = [], "", 0
+        for unit in units:
+            cut = False
+            while unit:
+                unit_tokens = self._count_capped(unit, budget)
+                if current_tokens + unit_tokens + (1 if current else 0) <= budget:
+                    current = f"{current} {unit}" if current else unit
+                    current_tokens += unit_tokens + (1 if current_tokens else 0)
+                    break
+                room = budget - current_tokens - 1 if current else budget
+                if current and (unit_tokens <= budget or room < budget // 4):
+                    pieces.append((current, cut))
+                    current, current_tokens, cut = "", 0, False
+                    continue
+                end = self._fit(unit, room)
+                pieces.append((f"{current} {unit[:end]}".strip(), cut))
+                current, current_tokens = "", 0
+                unit, cut = unit[end:].lstrip(), not unit[end - 1].isspace()
+            if current and cut:
+                pieces.append((current, cut))
+                current, current_tokens = "", 0
+        if current:
+            pieces.append((current, False))
+
+        if not overlap or len(pieces) < 2:
+            return [piece for piece, _ in pieces]
+        overlapped = [pieces[0][0]]
+        for (previous, _), (piece, cut) in zip(pieces, pieces[1:]):
+            tokens = self.encoding.encode(previous, disallowed_special=())
+            # A token boundary can fall inside a Thai character; drop the partial bytes
+            tail = self.encoding.decode(tokens[-self.overlap_tokens:]).lstrip("\ufffd").strip()
+            overlapped.append(f"{tail}{'' if cut else ' '}{piece}")
+        return overlapped
+
+    # --- packing ---
+
+    def split_text(self, text: str) -> List[str]:
+        chunks, current, current_tokens = [], [], 0
+        heading = None
+
+        def emit():
+            nonlocal current, current_tokens
+            if current:
+                chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+
+        for kind, block in self.blocks(text):
+            if kind == "heading":
+                # A heading opens the next block rather than closing the previous chunk
+                heading = f"{heading}\n{block}" if heading else block
+                continue
+            if heading:
+                body = f"{heading}\n\n{block}"
+            else:
+                body = block
+
+            tokens = self.count(body)
+            if tokens > self.chunk_tokens:
+                emit()
+                if kind == "table":
+                    heading_tokens = self.count(heading) + 1 if heading else 0
+                    pieces = self._split_table(block, self.chunk_tokens - heading_tokens)
+                    if heading:
+                        pieces[0] = f"{heading}\n\n{pieces[0]}"
+                else:
+                    pieces = self._split_text(body, self.chunk_tokens)
+                chunks.extend(pieces[:-1])
+                body = pieces[-1] if pieces else ""
+                tokens = self.count(body)
+            heading = None
+            # One extra token per block for the blank line joining it
+            if current and current_tokens + tokens + 1 > self.chunk_tokens:
+                emit()
+            if body:
+                current.append(body)
+                current_tokens += tokens + 1
+
+        if heading:
+            current.append(heading)
+        emit()
+        return [chunk for chunk in chunks if chunk.strip()]
+
+
+def _split_worker(splitter, text: str) -> List[str]:
+    return splitter.split_text(text)
+
+
+def parallel_split(texts: Iterable[str], splitter, workers: int = 4, window: int = 64) -> Iterator[List[str]]:
+    """
+    splitter.split_text over `texts` in a process pool, in order, with at most `window` texts in flight.
+    """
+    if workers <= 1:
+        for text in texts:
+            yield splitter.split_text(text)
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for text in texts:
+            pending.append(pool.submit(_split_worker, splitter, text))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def make_splitter(kind: str = "tokens"):
+    """
+    "tokens": TokenChunker (CHUNK_TOKENS / CHUNK_OVERLAP_TOKENS); "chars": the original 800/100 character splitter.
+    """
+    if kind == "chars":
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        return RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
+    if kind == "tokens":
+        return TokenChunker.from_env()
+    raise ValueError(f"Unknown splitter: {kind}")
+
+
+def bench(dirs: List[str], workers: int, limit: int = None):
+    texts = []
+    for base_dir in dirs:
+        for content_path in sorted(Path(base_dir).glob("*/content.txt")):
+            texts.append(content_path.read_text(encoding="utf-8"))
+    texts = texts[:limit] if limit else texts
+    if not texts:
+        print("No content.txt files found.")
+        return
+    counter = TokenChunker()
+    size = sum(len(text.encode("utf-8")) for text in texts)
+    print(f"📚 {len(texts)} documents, {size / 1024 / 1024:.1f} MB, {sum(map(counter.count, texts))} tokens")
+
+    print(f"{'splitter':<22}{'chunks':>8}{'tokens':>10}{'mean':>7}{'max':>6}{'p95':>6}{'docs/s':>9}")
+    for label, kind, pool_workers in [
+        ("chars 800/100", "chars", 1),
+        ("tokens", "tokens", 1),
+        (f"tokens x{workers} procs", "tokens", workers),
+    ]:
+        splitter = make_splitter(kind)
+        started = time.perf_counter()
+        chunks = [chunk for pieces in parallel_split(texts, splitter, workers=pool_workers) for chunk in pieces]
+        elapsed = time.perf_counter() - started
+        tokens = sorted(counter.count(chunk) for chunk in chunks)
+        p95 = tokens[int(0.95 * (len(tokens) - 1))] if tokens else 0
+        print(
+            f"{label:<22}{len(chunks):>8}{sum(tokens):>10}{sum(tokens) / max(len(tokens), 1):>7.0f}"
+            f"{(tokens[-1] if tokens else 0):>6}{p95:>6}{len(texts) / elapsed:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the token-aware chunker with the character splitter.")
+    parser.add_argument("command", choices=["bench"])
+    parser.add_argument("dirs", nargs="*", default=["rag_outputs/ocr_only", "rag_outputs/econ_ocr_only"])
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+    bench(args.dirs, args.workers, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,75 +1,53 @@
 import os
-import json
+import sys
+import asyncio
+import argparse
 from pathlib import Path
 from dotenv import load_dotenv
-from tqdm import tqdm
-from uuid import uuid4
 
-from langchain.schema import Document
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-
-from pinecone import Pinecone as PineconeClient, ServerlessSpec
+# Share the embedding cache with the backend
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.utils.embedding_cache import get_embeddings
+from backend.vectorstores import get_vector_store
+from chunker import make_splitter
+from ingestion import IndexManifest, IngestionEngine, iter_source_documents
+
+parser = argparse.ArgumentParser(description="Index the economic documents in rag_outputs/econ_ocr_only")
+parser.add_argument("--incremental", action="store_true", help="Only embed/upsert new or changed chunks and delete stale ones")
+parser.add_argument("--dry-run", action="store_true", help="Print the diff against the manifest without applying it")
+parser.add_argument("--splitter", choices=["tokens", "chars"], default=os.getenv("SPLITTER", "tokens"),
+                    help="Token-aware chunker (default) or the original 800/100 character splitter")
+parser.add_argument("--split-workers", type=int, default=int(os.getenv("SPLIT_WORKERS", min(4, os.cpu_count() or 1))),
+                    help="Processes used to split documents")
+args = parser.parse_args()
 
 # === Load .env ===
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-assert OPENAI_API_KEY and PINECONE_API_KEY, "❌ Missing API Keys"
+assert OPENAI_API_KEY and (PINECONE_API_KEY or os.getenv("VECTOR_BACKEND") == "local"), "❌ Missing API Keys"
 
 # === Init Clients ===
-embedding = OpenAIEmbeddings(openai_api_key=OPENAI_API_KEY)
+embedding = get_embeddings()  # unchanged chunks are served from .cache/embeddings.sqlite
 
 index_name = "economic-rag-ocr-index"
-pc = PineconeClient(api_key=PINECONE_API_KEY)
-if index_name not in pc.list_indexes().names():
-    pc.create_index(
-        name=index_name,
-        dimension=1536,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region="us-east-1"),
-    )
-index = pc.Index(index_name)
+# Pinecone by default; VECTOR_BACKEND=local writes the memory-mapped local index instead
+index = get_vector_store(index_name)
+index.create_if_missing(dimension=1536)
 
-# === Load raw documents ===
+# === Documents + splitter ===
+# Documents are read lazily, one source folder at a time, and split per document
 base_dir = Path("rag_outputs/econ_ocr_only")
-raw_documents = []
-for doc_dir in tqdm(list(base_dir.iterdir()), desc="📄 Loading OCR Docs"):
-    if doc_dir.is_dir():
-        content_path = doc_dir / "content.txt"
-        meta_path = doc_dir / "meta.json"
-        if content_path.exists() and meta_path.exists():
-            with open(content_path, "r", encoding="utf-8") as f:
-                text = f.read()
-            with open(meta_path, "r", encoding="utf-8") as m:
-                metadata = json.load(m)
-            raw_documents.append(Document(page_content=text, metadata=metadata))
-
-print(f"✅ Loaded {len(raw_documents)} raw documents")
-
-# === Split documents ===
-splitter = RecursiveCharacterTextSplitter(chunk_size=800, chunk_overlap=100)
-split_documents = []
-for doc in raw_documents:
-    chunks = splitter.split_text(doc.page_content)
-    for i, chunk in enumerate(chunks):
-        split_documents.append(
-            Document(page_content=chunk, metadata={**doc.metadata, "chunk_id": i})
-        )
-
-print(f"✂️ Split into {len(split_documents)} chunks")
+splitter = make_splitter(args.splitter)
 
 # === Embed + Upsert in batches ===
-batch_size = 50
-for i in tqdm(range(0, len(split_documents), batch_size), desc="📤 Upserting to Pinecone"):
-    batch = split_documents[i:i + batch_size]
-    vectors = []
-    for doc in batch:
-        vec_id = str(uuid4())
-        vector = embedding.embed_query(doc.page_content)
-        metadata = {k: ("" if v is None else v) for k, v in doc.metadata.items()}
-        metadata["page_content"] = doc.page_content 
-        vectors.append((vec_id, vector, metadata))
-    index.upsert(vectors=vectors)
-
-print(f"🚀 Completed upserting {len(split_documents)} chunks to index '{index_name}'")
\ No newline at end of file
+# Chunks stream into large embed_documents batches, pipelined with upserts under a bounded in-flight window.
+# Chunk ids hash source + content, and the manifest records what the index already holds.
+engine = IngestionEngine(embedding, index, batch_size=256, max_in_flight=4, split_workers=args.split_workers)
+manifest = IndexManifest(Path("rag_outputs/.manifests") / f"{index_name}.json")
+plan = asyncio.run(engine.sync(
+    lambda: iter_source_documents(base_dir), splitter, manifest, incremental=args.incremental, dry_run=args.dry_run
+))
+
+if not args.dry_run:
+    print(f"🚀 Completed upserting {plan.upserts} chunks to index '{index_name}'")
\ No newline at end of file
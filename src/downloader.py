@@ -0,0 +1,190 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class Downloader:
+    """
+    Shared HTTP layer for the preparation scripts.
+
+    One pooled `requests.Session` with retry + exponential backoff, a
+    content-addressed store (<root>/objects/<sha256>) and an index of
+    ETag / Last-Modified per URL, so unchanged files are revalidated with a
+    conditional GET instead of being downloaded again. Within `fresh_for`
+    seconds of the last check a URL is not requested at all. Concurrent
+    downloads are limited per host.
+    """
+
+    def __init__(self, root: str = "downloads", per_host: int = 4, pool_size: int = 16,
+                 max_retries: int = 5, backoff: float = 0.5, timeout: float = 60, fresh_for: float = 3600):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.index: Dict[str, dict] = {}
+        if self.index_path.exists():
+            self.index = json.loads(self.index_path.read_text(encoding="utf-8"))
+        self.timeout = timeout
+        self.fresh_for = fresh_for
+        self.workers = pool_size
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._hosts = defaultdict(lambda: threading.BoundedSemaphore(per_host))
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "not_modified": 0, "downloaded": 0, "bytes": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            root=os.environ.get("DOWNLOAD_DIR", "downloads"),
+            per_host=int(os.environ.get("DOWNLOAD_PER_HOST", 4)),
+            max_retries=int(os.environ.get("DOWNLOAD_RETRIES", 5)),
+            fresh_for=float(os.environ.get("DOWNLOAD_FRESH_FOR", 3600)),
+        )
+
+    def _host(self, url: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            return self._hosts[urlparse(url).netloc]
+
+    def _save_index(self):
+        tmp_path = self.index_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.index, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp_path.replace(self.index_path)
+
+    def _link(self, url: str, sha256: str) -> Path:
+        """
+        Expose the object under the URL's file name in <root>, as the scripts always did.
+        """
+        target = self.objects / sha256
+        path = self.root / (Path(urlparse(url).path).name or sha256)
+        if path.exists() and os.path.samefile(path, target):
+            return path
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(target, tmp_path)
+        except OSError:
+            tmp_path.write_bytes(target.read_bytes())
+        tmp_path.replace(path)
+        return path
+
+    def fetch(self, url: str) -> Path:
+        """
+        Local path of the file at `url`, downloading only when it is new or has changed.
+        """
+        with self._lock:
+            entry = dict(self.index.get(url, {}))
+        if entry and (self.objects / entry["sha256"]).exists():
+            if time.time() - entry["fetched_at"] < self.fresh_for:
+                with self._lock:
+                    self.stats["fresh"] += 1
+                return self._link(url, entry["sha256"])
+            headers = {}
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        else:
+            entry, headers = {}, {}
+
+        with self._host(url):
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and entry:
+                    entry["fetched_at"] = time.time()
+                    with self._lock:
+                        self.index[url] = entry
+                        self.stats["not_modified"] += 1
+                        self._save_index()
+                    return self._link(url, entry["sha256"])
+                response.raise_for_status()
+
+                digest = hashlib.sha256()
+                tmp_path = self.objects / f".{threading.get_ident()}.part"
+                size = 0
+                with open(tmp_path, "wb") as f:
+                    for block in response.iter_content(chunk_size=1 << 16):
+                        digest.update(block)
+                        f.write(block)
+                        size += len(block)
+                sha256 = digest.hexdigest()
+                tmp_path.replace(self.objects / sha256)
+
+                entry = {
+                    "sha256": sha256,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                }
+
+        with self._lock:
+            self.index[url] = entry
+            self.stats["downloaded"] += 1
+            self.stats["bytes"] += size
+            self._save_index()
+        return self._link(url, sha256)
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Union[Path, Exception]]:
+        """
+        Fetch URLs concurrently (still limited per host); failures are returned, not raised.
+        """
+        urls = list(dict.fromkeys(url for url in urls if url))
+
+        def fetch(url):
+            try:
+                return self.fetch(url)
+            except Exception as e:
+                print(f"❌ Download failed for {url}: {e}")
+                return e
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="download") as pool:
+            return dict(zip(urls, pool.map(fetch, urls)))
+
+    def get_json(self, url: str, params: Optional[dict] = None):
+        with self._host(url):
+            response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def report(self):
+        print(
+            f"🌐 Downloads: {self.stats['downloaded']} fetched ({self.stats['bytes'] / 1024 / 1024:.1f} MB), "
+            f"{self.stats['not_modified']} unchanged (304), {self.stats['fresh']} served without a request"
+        )
+
+
+_downloader: Optional[Downloader] = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader() -> Downloader:
+    """
+    Process-wide Downloader: DOWNLOAD_DIR (default downloads), DOWNLOAD_PER_HOST (default 4),
+    DOWNLOAD_RETRIES (default 5), DOWNLOAD_FRESH_FOR seconds without revalidation (default 3600).
+    """
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = Downloader.from_env()
+        return _downloader
@@ -0,0 +1,94 @@
+"""
+Local stand-in for the Finnomena fund API, for running the fund scripts offline.
+
+Serves a deterministic catalog in the shape of /fn3/api/fund/v2/public/filter
+(`{"data": {"funds": [...]}}`, paged with `page` / `per_page`) and a small
+text-layer PDF per fund as its fact sheet.
+
+    python src/finnomena_stub.py --funds 120 --port 8765
+    FINNOMENA_API_URL=http://127.0.0.1:8765/fn3/api/fund/v2/public/filter python src/prepare_rag_fund_data_orc_only.py
+"""
+import argparse
+import functools
+from typing import List
+
+import fitz
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+API_PATH = "/fn3/api/fund/v2/public/filter"
+
+
+def make_fund(index: int, base_url: str) -> dict:
+    fund_id = f"F{index:05d}"
+    return {
+        "fund_id": fund_id,
+        "short_code": f"STUB-{index}",
+        "amc_name": f"Stub Asset Management {index % 7}",
+        "nav": round(10 + index * 0.137, 4),
+        "nav_date": "2025-01-31",
+        "return_1m": round((index % 11) - 5 + 0.25, 2),
+        "return_1y": round((index % 17) - 6 + 0.5, 2),
+        "sharpe_ratio_1y": round((index % 9) / 10, 2),
+        "max_drawdown_1y": -round((index % 13) + 0.5, 2),
+        "fund_fact_sheet": f"{base_url.rstrip('/')}/factsheets/{fund_id}.pdf",
+        "fees": [{"description": "ค่าธรรมเนียมการจัดการ", "rate": 1.5, "unit": "%"}],
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def fact_sheet_pdf(fund_id: str) -> bytes:
+    doc = fitz.open()
+    for page_num in range(2):
+        page = doc.new_page()
+        page.insert_textbox(
+            fitz.Rect(50, 50, 550, 800),
+            f"Fund {fund_id}, page {page_num + 1}. " + "The fund invests in Thai equities and bonds. " * 20,
+        )
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+def create_app(funds: int = 120) -> Starlette:
+    """
+    `funds` funds in catalog order; a page past the end returns an empty list, like the real API.
+    """
+
+    async def catalog(request: Request):
+        page = max(1, int(request.query_params.get("page", 1)))
+        per_page = max(1, int(request.query_params.get("per_page", 10)))
+        start = (page - 1) * per_page
+        items: List[dict] = [
+            make_fund(i, str(request.base_url)) for i in range(start, min(start + per_page, funds))
+        ]
+        return JSONResponse({"status": True, "data": {"funds": items}})
+
+    async def fact_sheet(request: Request):
+        fund_id = request.path_params["fund_id"]
+        return Response(fact_sheet_pdf(fund_id), media_type="application/pdf", headers={"ETag": f'"{fund_id}"'})
+
+    return Starlette(routes=[
+        Route(API_PATH, catalog),
+        Route("/factsheets/{fund_id}.pdf", fact_sheet),
+    ])
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the Finnomena fund API.")
+    parser.add_argument("--funds", type=int, default=120)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"🧪 FINNOMENA_API_URL=http://{args.host}:{args.port}{API_PATH}")
+    uvicorn.run(create_app(args.funds), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Set
+
+_DONE = object()
+
+
+class FundCheckpoint:
+    """
+    Append-only record of processed fund_ids, one per line, so an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: Set[str] = set()
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self.done = {line.strip() for line in self.path.read_text(encoding="utf-8").splitlines() if line.strip()}
+
+    def __contains__(self, fund_id: str) -> bool:
+        return str(fund_id) in self.done
+
+    def add(self, fund_id: str):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(f"{fund_id}\n")
+            self.done.add(str(fund_id))
+
+
+async def stream_funds(fetch_page: Callable[[int], List[dict]], pages: Iterable[int],
+                       concurrency: int = 4) -> AsyncIterator[dict]:
+    """
+    Fetch catalog pages concurrently and yield each fund once, as soon as its page arrives.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(page: int) -> List[dict]:
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(fetch_page, page)
+            except Exception as e:
+                print(f"Failed to fetch page {page}: {e}")
+                return []
+
+    seen = set()
+    for page in asyncio.as_completed([fetch(page) for page in pages]):
+        for fund in await page:
+            if fund["fund_id"] not in seen:
+                seen.add(fund["fund_id"])
+                yield fund
+
+
+async def _stage(name: str, fn: Callable, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue], workers: int,
+                 next_workers: int, stats: dict):
+    """
+    `workers` tasks running the blocking `fn` in threads; an item whose `fn` fails is dropped (and retried next run).
+    """
+    async def work():
+        while True:
+            fund, value = await inbox.get()
+            if fund is _DONE:
+                return
+            try:
+                result = await asyncio.to_thread(fn, value)
+            except Exception as e:
+                print(f"❌ {name} failed for {fund['fund_id']}: {e}")
+                stats["failed"] += 1
+                continue
+            if outbox is not None:
+                await outbox.put((fund, result))
+            else:
+                stats["written"] += 1
+
+    await asyncio.gather(*[work() for _ in range(workers)])
+    if outbox is not None:
+        for _ in range(next_workers):
+            await outbox.put((_DONE, None))
+
+
+async def run_fund_pipeline(funds: AsyncIterator[dict], download: Callable, extract: Callable, write: Callable,
+                            checkpoint: FundCheckpoint, download_workers: int = 8, extract_workers: int = 2,
+                            write_workers: int = 1, skip: Callable[[dict], bool] = None) -> dict:
+    """
+    Stream funds through download(fund) -> extract(fund) -> doc -> write(doc), each stage with its own
+    bounded concurrency.
+
+    Stages are joined by bounded queues, so a slow OCR stage applies backpressure instead of
+    buffering the whole catalog. A fund is checkpointed only after it has been written.
+    """
+    stats = {"seen": 0, "skipped": 0, "written": 0, "failed": 0}
+    to_download = asyncio.Queue(maxsize=download_workers)
+    to_extract = asyncio.Queue(maxsize=extract_workers)
+    to_write = asyncio.Queue(maxsize=write_workers)
+
+    def fetch(fund):
+        download(fund)
+        return fund
+
+    def write_and_checkpoint(doc):
+        write(doc)
+        checkpoint.add(doc["id"])
+
+    stages = [
+        asyncio.create_task(_stage("Download", fetch, to_download, to_extract, download_workers, extract_workers, stats)),
+        asyncio.create_task(_stage("Extract", extract, to_extract, to_write, extract_workers, write_workers, stats)),
+        asyncio.create_task(_stage("Write", write_and_checkpoint, to_write, None, write_workers, 0, stats)),
+    ]
+
+    started = time.perf_counter()
+    async for fund in funds:
+        stats["seen"] += 1
+        if fund["fund_id"] in checkpoint or (skip is not None and skip(fund)):
+            stats["skipped"] += 1
+            continue
+        await to_download.put((fund, fund))
+    for _ in range(download_workers):
+        await to_download.put((_DONE, None))
+    await asyncio.gather(*stages)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ {stats['written']} funds written, {stats['skipped']} already done, {stats['failed']} failed "
+        f"({stats['seen']} seen in {elapsed:.1f}s)"
+    )
+    return stats
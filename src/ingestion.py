@@ -0,0 +1,285 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from collections import deque
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from langchain.schema import Document
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tqdm import tqdm
+
+from chunker import parallel_split
+
+# Metadata that changes on every OCR run without the document changing
+VOLATILE_METADATA = {"last_updated", "chunk_id"}
+# Extraction bookkeeping kept in meta.json but not stored on the vectors
+LOCAL_METADATA = {"page_extraction"}
+
+
+def chunk_vector_id(source_id: str, text: str) -> str:
+    """
+    Deterministic vector id from the source and the chunk content, so re-runs overwrite instead of duplicating.
+    """
+    return hashlib.sha256(f"{source_id}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    """
+    Local record of what is in an index: per source, its content/metadata hashes and chunk ids.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.sources: Dict[str, dict] = {}
+        if self.path.exists():
+            self.sources = json.loads(self.path.read_text(encoding="utf-8")).get("sources", {})
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"sources": self.sources}, ensure_ascii=False, indent=1), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+def iter_source_documents(base_dir: Path) -> Iterator[Document]:
+    """
+    Lazily yield one Document per <base_dir>/<source>/{content.txt, meta.json}; nothing is kept in memory.
+    """
+    for source_dir in Path(base_dir).iterdir():
+        content_path = source_dir / "content.txt"
+        meta_path = source_dir / "meta.json"
+        if source_dir.is_dir() and content_path.exists() and meta_path.exists():
+            text = content_path.read_text(encoding="utf-8")
+            metadata = json.loads(meta_path.read_text(encoding="utf-8"))
+            # Stable per-source key for deterministic chunk ids and the manifest
+            metadata["source_id"] = source_dir.name
+            yield Document(page_content=text, metadata=metadata)
+
+
+def split_document(doc: Document, splitter) -> List[Document]:
+    return [
+        Document(page_content=chunk, metadata={**doc.metadata, "chunk_id": i})
+        for i, chunk in enumerate(splitter.split_text(doc.page_content))
+    ]
+
+
+def split_documents(documents: Iterable[Document], splitter, workers: int = 1) -> Iterator[Tuple[Document, List[Document]]]:
+    """
+    (document, chunks) in order; with workers > 1 the splitting runs in a process pool over a bounded window.
+    """
+    window = deque()
+
+    def texts():
+        for doc in documents:
+            window.append(doc)
+            yield doc.page_content
+
+    for pieces in parallel_split(texts(), splitter, workers=workers):
+        doc = window.popleft()
+        yield doc, [
+            Document(page_content=chunk, metadata={**doc.metadata, "chunk_id": i})
+            for i, chunk in enumerate(pieces)
+        ]
+
+
+def diff_source(source_id: str, chunks: List[Document], previous: Optional[dict], incremental: bool = True):
+    """
+    Compare one source's chunks with its manifest entry.
+
+    Returns (status, entry, chunks to upsert, stale chunk ids). Incremental: only new/changed
+    chunks are upserted. Full: every chunk is upserted (ids are deterministic, so nothing
+    duplicates). Stale ids are deleted either way.
+    """
+    ids = [chunk_vector_id(source_id, chunk.page_content) for chunk in chunks]
+    for chunk, vec_id in zip(chunks, ids):
+        chunk.metadata["vec_id"] = vec_id
+    stable_metadata = {k: v for k, v in chunks[0].metadata.items() if k not in VOLATILE_METADATA | LOCAL_METADATA | {"vec_id"}}
+    entry = {
+        "text_hash": _hash("\0".join(chunk.page_content for chunk in chunks)),
+        "meta_hash": _hash(json.dumps(stable_metadata, sort_keys=True, ensure_ascii=False, default=str)),
+        "chunk_ids": list(dict.fromkeys(ids)),
+    }
+    # Keep one copy of chunks that repeat inside a source
+    chunks = list({chunk.metadata["vec_id"]: chunk for chunk in chunks}.values())
+
+    if previous is None:
+        return "new", entry, chunks, []
+
+    stale = sorted(set(previous["chunk_ids"]) - set(entry["chunk_ids"]))
+    if previous["text_hash"] == entry["text_hash"] and previous["meta_hash"] == entry["meta_hash"]:
+        return "unchanged", entry, ([] if incremental else chunks), stale
+    if previous["meta_hash"] != entry["meta_hash"] or not incremental:
+        # Metadata is stored on every vector, so all chunks of the source need rewriting
+        return "changed", entry, chunks, stale
+    known = set(previous["chunk_ids"])
+    return "changed", entry, [c for c in chunks if c.metadata["vec_id"] not in known], stale
+
+
+@dataclass
+class SyncPlan:
+    sources: Dict[str, dict] = field(default_factory=dict)
+    delete: List[str] = field(default_factory=list)
+    # Sources whose chunks have to be embedded + upserted, and how many chunks that is
+    apply: Set[str] = field(default_factory=set)
+    upserts: int = 0
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+    def summary(self) -> str:
+        return (
+            f"🧾 Sources: {self.new} new, {self.changed} changed, {self.unchanged} unchanged, {self.removed} removed\n"
+            f"   Chunks: {self.upserts} to embed + upsert, {len(self.delete)} to delete"
+        )
+
+
+def plan_sync(documents: Iterable[Document], splitter, manifest: IndexManifest, incremental: bool = True,
+              split_workers: int = 1) -> SyncPlan:
+    """
+    Planning pass: split and diff one source at a time, keeping only ids and counts.
+    """
+    plan = SyncPlan()
+    for doc, chunks in tqdm(split_documents(documents, splitter, split_workers), desc="🔎 Planning", unit="source"):
+        source_id = doc.metadata["source_id"]
+        if not chunks:
+            continue
+        status, entry, upsert, stale = diff_source(source_id, chunks, manifest.sources.get(source_id), incremental)
+        setattr(plan, status, getattr(plan, status) + 1)
+        plan.sources[source_id] = entry
+        plan.delete.extend(stale)
+        if upsert:
+            plan.apply.add(source_id)
+            plan.upserts += len(upsert)
+
+    for source_id, previous in manifest.sources.items():
+        if source_id not in plan.sources:
+            plan.removed += 1
+            plan.delete.extend(previous["chunk_ids"])
+    return plan
+
+
+class IngestionEngine:
+    """
+    Stream chunks into the index: embed in large batches and upsert, pipelined.
+
+    Documents are consumed lazily and split one at a time. At most
+    `max_in_flight` batches are in progress, so memory stays flat regardless of
+    corpus size while embedding of the next batch overlaps with the upsert of
+    the previous one. Every embedding and upsert call is retried with
+    exponential backoff.
+    """
+
+    def __init__(self, embedding, index, batch_size: int = 256, upsert_batch_size: int = 100,
+                 max_in_flight: int = 4, max_retries: int = 5, split_workers: int = 1):
+        self.embedding = embedding
+        self.split_workers = split_workers
+        self.index = index
+        self.batch_size = batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+
+    async def _retry(self, fn, *args):
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_exponential(multiplier=1, min=1, max=30),
+            retry=retry_if_exception_type(Exception),
+            reraise=True,
+        ):
+            with attempt:
+                return await fn(*args)
+
+    @staticmethod
+    def to_vector(doc: Document, values: List[float]):
+        metadata = {k: ("" if v is None else v) for k, v in doc.metadata.items()
+                    if k != "vec_id" and k not in LOCAL_METADATA}
+        metadata["page_content"] = doc.page_content
+        vec_id = doc.metadata.get("vec_id") or chunk_vector_id(doc.metadata.get("source_id", ""), doc.page_content)
+        return (vec_id, values, metadata)
+
+    async def _process(self, batch: List[Document], semaphore: asyncio.Semaphore, progress: tqdm):
+        try:
+            values = await self._retry(self.embedding.aembed_documents, [doc.page_content for doc in batch])
+            vectors = [self.to_vector(doc, vector) for doc, vector in zip(batch, values)]
+            for start in range(0, len(vectors), self.upsert_batch_size):
+                await self._retry(self.index.aupsert, vectors[start:start + self.upsert_batch_size])
+            progress.update(len(batch))
+        finally:
+            semaphore.release()
+
+    async def delete(self, ids: List[str]):
+        for start in range(0, len(ids), 1000):
+            await self._retry(self.index.adelete, ids[start:start + 1000])
+
+    async def ingest(self, documents: Iterable[Document], total: Optional[int] = None) -> dict:
+        """
+        Embed + upsert a (possibly lazy) stream of chunks; at most `max_in_flight` batches are held at once.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        started = time.perf_counter()
+        in_flight: List[asyncio.Task] = []
+        count = 0
+
+        with tqdm(total=total, desc="📤 Embedding + upserting", unit="chunk") as progress:
+            for batch in _batched(documents, self.batch_size):
+                await semaphore.acquire()
+                for task in [task for task in in_flight if task.done()]:
+                    task.result()  # surface a batch that failed after its retries
+                    in_flight.remove(task)
+                in_flight.append(asyncio.create_task(self._process(batch, semaphore, progress)))
+                count += len(batch)
+                # Let the new batch start its request before reading the next documents
+                await asyncio.sleep(0)
+            await asyncio.gather(*in_flight)
+
+        elapsed = time.perf_counter() - started
+        rate = count / elapsed if elapsed else 0.0
+        print(f"⚡ Ingested {count} chunks in {elapsed:.1f}s ({rate:.1f} chunks/sec)")
+        return {"chunks": count, "seconds": elapsed, "chunks_per_sec": rate}
+
+    async def sync(self, load_documents: Callable[[], Iterable[Document]], splitter, manifest: IndexManifest,
+                   incremental: bool = True, dry_run: bool = False) -> SyncPlan:
+        """
+        Two lazy passes over `load_documents()`: plan (print the diff against the manifest), then
+        re-split only the sources that need work and stream their chunks into the index.
+        """
+        plan = plan_sync(load_documents(), splitter, manifest, incremental=incremental, split_workers=self.split_workers)
+        print(plan.summary())
+        if dry_run:
+            print("🔍 Dry run: nothing applied.")
+            return plan
+
+        def upserts() -> Iterator[Document]:
+            documents = (doc for doc in load_documents() if doc.metadata["source_id"] in plan.apply)
+            for doc, chunks in split_documents(documents, splitter, self.split_workers):
+                source_id = doc.metadata["source_id"]
+                yield from diff_source(source_id, chunks, manifest.sources.get(source_id), incremental)[2]
+
+        if plan.upserts:
+            await self.ingest(upserts(), total=plan.upserts)
+        if plan.delete:
+            await self.delete(plan.delete)
+            print(f"🗑️ Deleted {len(plan.delete)} stale chunks")
+
+        manifest.sources = plan.sources
+        manifest.save()
+        return plan
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,486 @@
+import argparse
+import base64
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import unicodedata
+import concurrent.futures
+import functools
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterable, List, Tuple
+
+import fitz
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from backend.utils.cache import SQLiteKVStore
+
+DEFAULT_OCR_CACHE_PATH = ".cache/ocr_pages.sqlite"
+# Generation settings of typhoon_ocr.ocr_document (0.3.8), which takes a file path and has no
+# public way to send an image that is already rendered; keep in step when upgrading typhoon-ocr
+TYPHOON_REQUEST = {
+    "max_tokens": 16384,
+    "extra_body": {"repetition_penalty": 1.2, "temperature": 0.1, "top_p": 0.6},
+}
+
+
+def file_sha256(filename: Path) -> str:
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OCRPageCache:
+    """
+    OCR results keyed by (sha256 of the PDF bytes, page number, task type).
+
+    Re-running after a partial failure or a one-page change only pays for the missing pages.
+    """
+
+    def __init__(self, path: str = DEFAULT_OCR_CACHE_PATH):
+        self.store = SQLiteKVStore(path)
+
+    @staticmethod
+    def key(pdf_sha: str, page_num: int, task_type: str) -> str:
+        return SQLiteKVStore.make_key(pdf_sha, str(page_num), task_type)
+
+    def get_pages(self, pdf_sha: str, page_nums: Iterable[int], task_type: str) -> dict:
+        keys = {self.key(pdf_sha, page_num, task_type): page_num for page_num in page_nums}
+        found = self.store.get_many(keys)
+        return {keys[key]: value.decode("utf-8") for key, value in found.items()}
+
+    def put(self, pdf_sha: str, page_num: int, task_type: str, text: str):
+        self.store.set(self.key(pdf_sha, page_num, task_type), text.encode("utf-8"))
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+def text_layer_usable(page: "fitz.Page", text: str, min_chars: int = 200, min_valid_ratio: float = 0.95) -> bool:
+    """
+    True when a page's embedded text can be used as-is instead of OCR.
+
+    The layer must be dense (at least `min_chars` non-space characters), clean
+    (replacement characters, private-use glyphs from broken font encodings and
+    control characters stay under 1 - `min_valid_ratio`), and not just a
+    caption over a scanned image.
+    """
+    chars = [ch for ch in text if not ch.isspace()]
+    if len(chars) < min_chars:
+        return False
+    invalid = sum(1 for ch in chars if ch == "\ufffd" or unicodedata.category(ch) in ("Co", "Cn", "Cc"))
+    if 1 - invalid / len(chars) < min_valid_ratio:
+        return False
+
+    page_area = abs(page.rect) or 1.0
+    image_area = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    # A full-page scan with a thin text layer (a header, a stamp) still needs OCR
+    if image_area / page_area > 0.5 and len(chars) < 5 * min_chars:
+        return False
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def typhoon_helpers():
+    """
+    typhoon_ocr's (get_prompt, page_anchor_text), imported on first use so the
+    text-layer path and `python src/ocr_engine.py stats` work without it.
+
+    Importing typhoon_ocr raises ImportError unless poppler (pdfinfo, pdftoppm) is installed.
+    """
+    try:
+        from typhoon_ocr import get_prompt
+        from typhoon_ocr import ocr_utils
+    except ImportError as e:
+        raise RuntimeError(f"typhoon_ocr is unavailable, install it and poppler-utils to OCR pages: {e}") from e
+
+    def page_anchor_text(page, max_length: int) -> str:
+        """
+        typhoon_ocr.get_anchor_text(..., pdf_engine="pdfreport") for a page of an already open
+        pypdf.PdfReader; the library's version builds a new reader, re-parsing the PDF, per page.
+        Mirrors ocr_utils._pdf_report (typhoon-ocr 0.3.8); keep in step when upgrading.
+        """
+        xobjects = page.get("/Resources", {}).get("/XObject", {})
+        text_elements, image_elements = [], []
+
+        def visitor_body(text, cm, tm, font_dict, font_size):
+            txt2user = ocr_utils._mult(tm, cm)
+            text_elements.append(ocr_utils.TextElement(text, txt2user[4], txt2user[5]))
+
+        def visitor_op(op, args, cm, tm):
+            if op == b"Do":
+                xobject = xobjects.get(args[0])
+                if xobject and xobject["/Subtype"] == "/Image":
+                    x0, y0 = ocr_utils._transform_point(0, 0, cm)
+                    x1, y1 = ocr_utils._transform_point(1, 1, cm)
+                    image_elements.append(ocr_utils.ImageElement(
+                        args[0], ocr_utils.BoundingBox(min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)),
+                    ))
+
+        page.extract_text(visitor_text=visitor_body, visitor_operand_before=visitor_op)
+        report = ocr_utils.PageReport(
+            mediabox=ocr_utils.BoundingBox.from_rectangle(page.mediabox),
+            text_elements=text_elements,
+            image_elements=image_elements,
+        )
+        return ocr_utils._linearize_pdf_report(report, max_length=max_length)
+
+    return get_prompt, page_anchor_text
+
+
+def render_pages(path: str, page_indexes: List[int], target_image_dim: int = 1800,
+                 max_anchor_length: int = 8000) -> List[Tuple[int, bytes, str]]:
+    """
+    Render a run of pages to PNG bytes plus typhoon_ocr's anchor text for each, opening the
+    PDF once with PyMuPDF and once with pypdf. Runs in the render process pool.
+    """
+    from pypdf import PdfReader
+
+    _, page_anchor_text = typhoon_helpers()
+    reader = PdfReader(path)
+    rendered = []
+    with fitz.open(path) as doc:
+        for page_index in page_indexes:
+            page = doc[page_index]
+            zoom = target_image_dim / max(page.rect.width, page.rect.height)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+            anchor_text = page_anchor_text(reader.pages[page_index], max_anchor_length)
+            rendered.append((page_index, pixmap.tobytes("png"), anchor_text))
+    return rendered
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        return _render_pool
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class OCREngine:
+    """
+    Page-parallel Typhoon OCR shared by the preparation scripts.
+
+    Pages with a dense, valid text layer are extracted directly with PyMuPDF;
+    only scanned or garbled pages are sent to OCR. Those are rendered once in
+    a process pool (each worker opens the PDF once per run of pages) and
+    streamed as PNG buffers through a bounded window into one shared pool of
+    OCR threads; a token bucket replaces the fixed sleeps between requests.
+    A page that runs past
+    `page_timeout` is given up on without holding back its siblings, and page
+    order is preserved in the output.
+    """
+
+    def __init__(self, workers: int = 4, rate_per_sec: float = 2.0, page_timeout: float = 180, max_retries: int = 1,
+                 task_type: str = "default", cache: OCRPageCache = None, text_layer: bool = True,
+                 text_min_chars: int = 200, render_workers: int = None, render_chunk: int = 8,
+                 max_buffered_pages: int = None, target_image_dim: int = 1800):
+        self.workers = workers
+        self.render_workers = render_workers or min(4, os.cpu_count() or 1)
+        self.render_chunk = render_chunk
+        self.target_image_dim = target_image_dim
+        self.model = os.environ.get("TYPHOON_OCR_MODEL", "typhoon-ocr-preview")
+        # Rendered pages waiting for (or in) OCR, across all documents; bounds peak memory
+        self._buffered = threading.BoundedSemaphore(max_buffered_pages or 2 * workers)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self.cache = cache
+        self.text_layer = text_layer
+        self.text_min_chars = text_min_chars
+        self.page_timeout = page_timeout
+        self.max_retries = max_retries
+        self.task_type = task_type
+        self.bucket = TokenBucket(rate_per_sec, capacity=workers)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+        self.pages_done = 0
+        self.pages_cached = 0
+        self.pages_text = 0
+        self.started = time.perf_counter()
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            workers=int(os.environ.get("OCR_WORKERS", 4)),
+            rate_per_sec=float(os.environ.get("OCR_RATE", 2.0)),
+            page_timeout=float(os.environ.get("OCR_PAGE_TIMEOUT", 180)),
+            max_retries=int(os.environ.get("OCR_MAX_RETRIES", 1)),
+            cache=OCRPageCache(os.environ.get("OCR_CACHE_PATH", DEFAULT_OCR_CACHE_PATH))
+            if os.environ.get("OCR_CACHE_ENABLED", "1") != "0" else None,
+            text_layer=os.environ.get("OCR_TEXT_LAYER", "1") != "0",
+            text_min_chars=int(os.environ.get("OCR_TEXT_MIN_CHARS", 200)),
+            render_workers=int(os.environ.get("OCR_RENDER_WORKERS", 0)) or None,
+            max_buffered_pages=int(os.environ.get("OCR_PAGE_BUFFER", 0)) or None,
+        )
+
+    @property
+    def client(self):
+        """
+        One OpenAI-compatible client for every page, so connections are reused.
+        """
+        with self._client_lock:
+            if self._client is None:
+                from openai import OpenAI
+
+                self._client = OpenAI(
+                    base_url=os.environ.get("TYPHOON_BASE_URL", "https://api.opentyphoon.ai/v1"),
+                    api_key=os.getenv("TYPHOON_OCR_API_KEY") or os.getenv("TYPHOON_API_KEY") or os.getenv("OPENAI_API_KEY"),
+                    # Every attempt together stays within the page deadline, so an abandoned page
+                    # frees its OCR worker and buffer slot instead of hanging on for the default 600s
+                    timeout=self.page_timeout / (self.max_retries + 1),
+                    max_retries=self.max_retries,
+                )
+            return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _ocr_image(self, page_index: int, image: bytes, anchor_text: str, started_at: dict,
+                   pdf_sha: str = None) -> str:
+        get_prompt, _ = typhoon_helpers()
+        self.bucket.acquire()
+        started_at[page_index] = time.monotonic()
+        # The messages typhoon_ocr.prepare_ocr_messages builds for a PDF page, from the already rendered image
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": get_prompt(self.task_type)(anchor_text)},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{base64.b64encode(image).decode('utf-8')}"}},
+                ],
+            }],
+            **TYPHOON_REQUEST,
+        )
+        text = json.loads(response.choices[0].message.content)["natural_text"].strip()
+        with self._stats_lock:
+            self.pages_done += 1
+        if self.cache is not None and pdf_sha:
+            self.cache.put(pdf_sha, page_index + 1, self.task_type, text)
+        return text
+
+    def _render_into_ocr(self, filename: Path, page_indexes: List[int], started_at: dict, pdf_sha: str,
+                         handoff: queue.Queue):
+        """
+        Producer: render runs of pages in the process pool, a few runs ahead, and hand each
+        page to the OCR threads once a buffer slot is free. Puts (page_index, future or error), then None.
+        """
+        pool = get_render_pool(self.render_workers)
+        runs = iter([page_indexes[i:i + self.render_chunk] for i in range(0, len(page_indexes), self.render_chunk)])
+        ahead = deque()
+
+        def render_next():
+            run = next(runs, None)
+            if run is not None:
+                ahead.append((run, pool.submit(render_pages, str(filename), run, self.target_image_dim)))
+
+        try:
+            for _ in range(self.render_workers):
+                render_next()
+            while ahead:
+                run, rendering = ahead.popleft()
+                try:
+                    rendered = rendering.result()
+                except Exception as e:
+                    for page_index in run:
+                        handoff.put((page_index, e))
+                    continue
+                finally:
+                    render_next()
+
+                for page_index, image, anchor_text in rendered:
+                    self._buffered.acquire()
+                    future = self.executor.submit(self._ocr_image, page_index, image, anchor_text, started_at, pdf_sha)
+                    future.add_done_callback(lambda _: self._buffered.release())
+                    handoff.put((page_index, future))
+        finally:
+            handoff.put(None)
+
+    def _text_layer_pages(self, filename: Path) -> List:
+        """
+        Embedded text for every page, or None where the page needs OCR.
+        """
+        with fitz.open(str(filename)) as doc:
+            if not self.text_layer:
+                return [None] * doc.page_count
+            pages = []
+            for page in doc:
+                text = page.get_text()
+                pages.append(text.strip() if text_layer_usable(page, text, self.text_min_chars) else None)
+            return pages
+
+    def extract_pdf(self, filename: Path) -> Tuple[str, List[str]]:
+        """
+        Text of the whole PDF plus, per page, how it was obtained: "text", "ocr" or "failed".
+        """
+        filename = Path(filename)
+        layer = self._text_layer_pages(filename)
+        total_pages = len(layer)
+
+        texts = [text or "" for text in layer]
+        paths = ["text" if text is not None else "ocr" for text in layer]
+        needs_ocr = [i for i in range(total_pages) if layer[i] is None]
+        with self._stats_lock:
+            self.pages_text += total_pages - len(needs_ocr)
+
+        pdf_sha, cached_pages = None, {}
+        if self.cache is not None and needs_ocr:
+            pdf_sha = file_sha256(filename)
+            cached_pages = self.cache.get_pages(pdf_sha, [i + 1 for i in needs_ocr], self.task_type)
+            for page_num, text in cached_pages.items():
+                texts[page_num - 1] = text
+        # Blank pages are cached too, so only pages that never completed are OCR'd again
+        missing = [i for i in needs_ocr if i + 1 not in cached_pages]
+        cached = len(needs_ocr) - len(missing)
+        with self._stats_lock:
+            self.pages_cached += cached
+
+        print(
+            f"📄 Processing {filename.name} ({total_pages} pages: {total_pages - len(needs_ocr)} text layer, "
+            f"{cached} from cache, {len(missing)} to OCR)"
+        )
+
+        if missing:
+            try:
+                typhoon_helpers()
+            except RuntimeError as e:
+                # Text-layer and cached pages are still returned
+                print(f"❌ Cannot OCR {len(missing)} pages of {filename.name}: {e}")
+                for page_index in missing:
+                    paths[page_index] = "failed"
+                missing = []
+
+        started_at, futures, pending = {}, {}, set()
+        handoff = queue.Queue()
+        rendering = bool(missing)
+        if rendering:
+            threading.Thread(
+                target=self._render_into_ocr, args=(filename, missing, started_at, pdf_sha, handoff),
+                name="ocr-render", daemon=True,
+            ).start()
+
+        while rendering or pending:
+            while rendering:
+                try:
+                    item = handoff.get(timeout=0.2) if not pending else handoff.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    rendering = False
+                    break
+                page_index, result = item
+                if isinstance(result, Exception):
+                    paths[page_index] = "failed"
+                    print(f"❌ Render error on page {page_index + 1} of {filename.name}: {result}")
+                    continue
+                futures[result] = page_index
+                pending.add(result)
+            if not pending:
+                continue
+
+            done, pending = concurrent.futures.wait(
+                pending, timeout=0.2, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                page_index = futures[future]
+                try:
+                    texts[page_index] = future.result()
+                except Exception as e:
+                    paths[page_index] = "failed"
+                    print(f"❌ OCR error on page {page_index + 1} of {filename.name}: {e}")
+
+            # The deadline starts when a page actually begins, not while it waits for a worker
+            now = time.monotonic()
+            for future in list(pending):
+                page_index = futures[future]
+                if page_index in started_at and now - started_at[page_index] > self.page_timeout:
+                    paths[page_index] = "failed"
+                    print(f"⏱️ OCR timeout on page {page_index + 1} of {filename.name}, skipping.")
+                    pending.discard(future)
+
+        return "\n\n".join(text for text in texts if text), paths
+
+    def ocr_pdf(self, filename: Path) -> str:
+        return self.extract_pdf(filename)[0]
+
+    def map_documents(self, fn: Callable, items: Iterable, workers: int = 2) -> List:
+        """
+        Run `fn` over documents concurrently; their pages share the OCR worker pool.
+        """
+        def run(item):
+            try:
+                return fn(item)
+            except Exception as e:
+                print(f"❌ Failed to process document: {e}")
+                return None
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-doc") as pool:
+            return list(pool.map(run, items))
+
+    def report(self):
+        elapsed = time.perf_counter() - self.started
+        rate = self.pages_done / elapsed if elapsed else 0.0
+        print(
+            f"⚡ OCR'd {self.pages_done} pages in {elapsed:.1f}s ({rate:.2f} pages/sec), "
+            f"{self.pages_text} pages from the text layer, {self.pages_cached} from cache"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the OCR page cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=os.environ.get("OCR_CACHE_PATH", DEFAULT_OCR_CACHE_PATH))
+    args = parser.parse_args()
+
+    cache = OCRPageCache(args.path)
+    if args.command == "clear":
+        cache.store.clear()
+        print(f"🧹 Cleared {args.path}")
+        return
+
+    stats = cache.stats()
+    print(f"📦 {args.path}: {stats['entries']} pages, {stats['bytes'] / 1024 / 1024:.1f} MB")
+    print(
+        f"🎯 Hit rate: {stats['total_hit_rate']:.1%} "
+        f"({stats['total_hits']} hits / {stats['total_misses']} misses across runs)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,21 @@
 import csv
-import requests
-from typhoon_ocr import ocr_document
+import os
 from pathlib import Path
 from datetime import datetime, timezone
 import json
 from urllib.parse import urlparse
-import fitz
-import time
-import concurrent.futures  
+from downloader import get_downloader
+from ocr_engine import OCREngine
 
-def extract_text_from_pdf_ocr_only(file_type: str, source: str) -> str:
+# Shared page-level OCR pool; tune with OCR_WORKERS, OCR_RATE (pages/sec) and OCR_PAGE_TIMEOUT
+OCR = OCREngine.from_env()
+
+def extract_text_from_pdf_ocr_only(file_type: str, source: str):
     try:
         # Load PDF
         if file_type == "url":
-            response = requests.get(source)
-            response.raise_for_status()
-            save_path = Path("downloads")
-            save_path.mkdir(exist_ok=True)
-            filename = save_path / Path(urlparse(source).path).name
-            with open(filename, "wb") as f:
-                f.write(response.content)
+            # Pooled, retried, and skipped when the server says the file is unchanged
+            filename = get_downloader().fetch(source)
         elif file_type == "file":
             filename = Path(source)
             if not filename.exists():
@@ -27,39 +23,12 @@ def extract_text_from_pdf_ocr_only(file_type: str, source: str) -> str:
         else:
             raise ValueError(f"Unknown file type: {file_type}")
 
-        # Count total pages
-        with fitz.open(str(filename)) as doc:
-            total_pages = doc.page_count
-
-        print(f"📄 Processing {filename.name} ({total_pages} pages)")
-
-        # Run OCR page-by-page
-        all_text = []
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            for page_index in range(total_pages):
-                try:
-                    print(f"  🔍 OCR page {page_index + 1} of {total_pages}")
-                    future = executor.submit(
-                        ocr_document,
-                        pdf_or_image_path=str(filename),
-                        task_type="default",
-                        page_num=page_index
-                    )
-                    page_text = future.result(timeout=180)  # ⏱️ Timeout 60s
-                    all_text.append(page_text.strip())
-                except concurrent.futures.TimeoutError:
-                    print(f"⏱️ OCR timeout on page {page_index + 1}, skipping.")
-                    continue
-                except Exception as e:
-                    print(f"❌ OCR error on page {page_index + 1}: {e}")
-                    continue
-                time.sleep(0.5)
-
-        return "\n\n".join(all_text)
+        # Text-layer pages are read directly; the rest are OCR'd concurrently (order preserved)
+        return OCR.extract_pdf(filename)
 
     except Exception as e:
         print(f"❌ OCR error for {source}: {e}")
-        return "OCR failed or unavailable"
+        return "OCR failed or unavailable", []
 
 
 def format_econ_for_rag(row: dict):
@@ -67,7 +36,7 @@ def format_econ_for_rag(row: dict):
     source = row.get("source_file", "").strip() if file_type == "file" else row.get("source_url", "").strip()
 
     # Run OCR
-    text = extract_text_from_pdf_ocr_only(file_type, source)
+    text, page_extraction = extract_text_from_pdf_ocr_only(file_type, source)
     doc_id = Path(source).stem if file_type == "file" else Path(urlparse(source).path).stem
 
     # Create output folder
@@ -86,6 +55,8 @@ def format_econ_for_rag(row: dict):
         "source_url": row.get("source_url", "").strip(),
         "source_file": row.get("source_file", "").strip(),
         "source_type": file_type,
+        # Per page: "text" (embedded text layer), "ocr" or "failed"
+        "page_extraction": page_extraction,
     }
 
     with open(output_dir / "meta.json", "w", encoding="utf-8") as mf:
@@ -96,9 +67,14 @@ def format_econ_for_rag(row: dict):
 
 def process_economic_csv(csv_path: Path):
     with open(csv_path, newline='', encoding='utf-8') as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            format_econ_for_rag(row)
+        rows = list(csv.DictReader(csvfile))
+    # Fetch remote PDFs up front, concurrently (limited per host); OCR then reads the local copies
+    downloader = get_downloader()
+    downloader.fetch_many(row.get("source_url", "").strip() for row in rows if row.get("type", "").strip() == "url")
+    # Documents run concurrently too; their pages share the OCR worker pool
+    OCR.map_documents(format_econ_for_rag, rows, workers=int(os.environ.get("OCR_DOC_WORKERS", 2)))
+    OCR.report()
+    downloader.report()
 
 
 if __name__ == "__main__":
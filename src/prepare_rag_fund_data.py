@@ -1,4 +1,6 @@
-import requests
+import asyncio
+import json
+from urllib.parse import urlparse
 from typhoon_ocr import ocr_document
 from langchain.output_parsers import PydanticOutputParser
 from langchain_openai import ChatOpenAI
@@ -7,6 +9,8 @@ from typing import Optional
 from dotenv import load_dotenv
 import os
 from pathlib import Path
+from downloader import get_downloader
+from fund_pipeline import FundCheckpoint, run_fund_pipeline, stream_funds
 
 load_dotenv(dotenv_path=Path(__file__).parent / ".env")
 
@@ -21,15 +25,13 @@ def fetch_funds(page=1, per_page=10):
     Returns:
         dict: Parsed JSON response.
     """
-    url = "https://www.finnomena.com/fn3/api/fund/v2/public/filter"
+    url = os.getenv("FINNOMENA_API_URL", "https://www.finnomena.com/fn3/api/fund/v2/public/filter")
     params = {
         "page": page,
         "per_page": per_page,
         "sort": "SR_10Y,DESC"
     }
-    resp = requests.get(url, params=params)
-    resp.raise_for_status()
-    return resp.json()
+    return get_downloader().get_json(url, params=params)
 
 def extract_policy_from_pdf(pdf_url: str) -> dict:
     from pathlib import Path
@@ -45,15 +47,8 @@ def extract_policy_from_pdf(pdf_url: str) -> dict:
         asset_allocation: Optional[str] = Field(None, description="Breakdown of asset allocation, e.g. 'Equity 60%, Bonds 40%'")
 
     try:
-        response = requests.get(pdf_url)
-        response.raise_for_status()
-
-        save_path = Path("downloads")
-        save_path.mkdir(exist_ok=True)
-        filename = save_path / Path(pdf_url).name
-
-        with open(filename, "wb") as f:
-            f.write(response.content)
+        # Pooled, retried, and skipped when the server says the file is unchanged
+        filename = get_downloader().fetch(pdf_url)
 
 
         print (f" typhoon_ocr: Processing {filename} for policy extraction...")
@@ -193,31 +188,29 @@ Key Fees:
         }
     }
 
+def write_fund(doc: dict):
+    print(doc["text"])
+    output_dir = Path("rag_outputs")
+    output_dir.mkdir(exist_ok=True)
+    fund_fact_sheet = doc["metadata"].get("fund_fact_sheet", "")
+    pdf_name = Path(urlparse(fund_fact_sheet).path).name if fund_fact_sheet else doc['id']
+    fund_folder = output_dir / pdf_name.replace(".pdf", "")
+    fund_folder.mkdir(parents=True, exist_ok=True)
+    filename = fund_folder / "content.txt"
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(doc["text"])
+    meta_filename = fund_folder / "meta.json"
+    with open(meta_filename, "w", encoding="utf-8") as mf:
+        json.dump(doc["metadata"], mf, ensure_ascii=False, indent=2)
+
 if __name__ == "__main__":
-    # Fetch pages 1 to 10 and aggregate all funds
-    all_pages = []
-    for page_num in range(1, 11):  # Fetch pages 1 to 10
-        try:
-            result = fetch_funds(page=page_num)
-            all_pages.extend(result["data"]["funds"])
-        except Exception as e:
-            print(f"Failed to fetch page {page_num}: {e}")
-        all_data = all_pages
-        
-        rag_docs = [format_fund_for_rag(f) for f in all_data]
-        for doc in rag_docs:  # print only first 2 for preview
-            print(doc["text"])
-            output_dir = Path("rag_outputs")
-            output_dir.mkdir(exist_ok=True)
-            from urllib.parse import urlparse
-            fund_fact_sheet = doc["metadata"].get("fund_fact_sheet", "")
-            pdf_name = Path(urlparse(fund_fact_sheet).path).name if fund_fact_sheet else doc['id']
-            fund_folder = output_dir / pdf_name.replace(".pdf", "")
-            fund_folder.mkdir(parents=True, exist_ok=True)
-            filename = fund_folder / "content.txt"
-            with open(filename, "w", encoding="utf-8") as f:
-                f.write(doc["text"])
-            import json
-            meta_filename = fund_folder / "meta.json"
-            with open(meta_filename, "w", encoding="utf-8") as mf:
-                json.dump(doc["metadata"], mf, ensure_ascii=False, indent=2)
\ No newline at end of file
+    # Pages 1-10, fetched concurrently; each fund goes download -> extract -> write exactly once
+    asyncio.run(run_fund_pipeline(
+        stream_funds(lambda page: fetch_funds(page=page)["data"]["funds"], range(1, 11)),
+        download=lambda fund: get_downloader().fetch(fund["fund_fact_sheet"]) if fund.get("fund_fact_sheet") else None,
+        extract=format_fund_for_rag,
+        write=write_fund,
+        checkpoint=FundCheckpoint(Path("rag_outputs/.checkpoints/fund_data.txt")),
+        extract_workers=int(os.getenv("FUND_EXTRACT_WORKERS", 2)),
+    ))
+    get_downloader().report()
@@ -0,0 +1,73 @@
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# The preparation scripts import their siblings by module name
+sys.path.insert(0, str(ROOT / "src"))
+
+
+@contextmanager
+def serve(app):
+    """
+    Run an ASGI app with uvicorn in a background thread; yields its base URL.
+    """
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("uvicorn did not start")
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+@pytest.fixture
+def offline_graph(monkeypatch):
+    """
+    Build a DoTACotGraph wired to benchmarks.fakes: `offline_graph(FakeProfile(...))`.
+    """
+    from backend.nodes import rerank
+    from benchmarks.fakes import install_fakes
+
+    for key in ("OPENAI_API_KEY", "COHERE_API_KEY", "PINECONE_API_KEY"):
+        monkeypatch.setenv(key, "test")
+    monkeypatch.setenv("VECTOR_BACKEND", "local")
+    monkeypatch.setenv("LLM_CACHE_ENABLED", "0")
+    # BM25 tokenization is not under test, and the NLTK punkt data may not be installed
+    monkeypatch.setattr(rerank, "word_tokenize", str.split)
+
+    def build(profile):
+        from backend.graph import DoTACotGraph
+
+        return install_fakes(DoTACotGraph(), profile)
+
+    return build
+
+
+async def run_graph(graph, query: str, job_id: str):
+    """
+    Run `graph` to the end and return DoTACotGraph.result() of its summary.
+    """
+    from backend.graph import DoTACotGraph
+
+    summary = None
+    async for update in graph.run({"configurable": {"thread_id": job_id}}, query=query, job_id=job_id):
+        summary = update.get("summary", summary)
+    return DoTACotGraph.result(summary)
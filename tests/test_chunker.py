@@ -0,0 +1,68 @@
+import pytest
+
+from backend.utils import token_budget
+from backend.utils.token_budget import ApproxEncoding
+from chunker import TokenChunker
+
+
+def chunker(chunk_tokens: int) -> TokenChunker:
+    splitter = TokenChunker(chunk_tokens=chunk_tokens, overlap_tokens=0)
+    # A fixed 4-characters-per-token encoding keeps the test offline and its counts predictable
+    splitter._encoding = ApproxEncoding()
+    return splitter
+
+
+def html_table(rows: int) -> str:
+    header = "<tr><th>Fund</th><th>Return 1Y</th><th>Sharpe</th></tr>"
+    body = "".join(f"<tr><td>FUND-{i}</td><td>{i * 1.7:.2f}%</td><td>0.{i}</td></tr>" for i in range(rows))
+    return f"<table>{header}{body}</table>"
+
+
+def markdown_table(rows: int) -> str:
+    lines = ["| Fund | Return 1Y | Sharpe |", "|---|---|---|"]
+    lines += [f"| FUND-{i} | {i * 1.7:.2f}% | 0.{i} |" for i in range(rows)]
+    return "\n".join(lines)
+
+
+def test_table_pieces_fit_the_budget_with_wrapper_and_header():
+    for budget in range(30, 90):
+        splitter = chunker(budget)
+        for table in [html_table(n) for n in range(1, 12)] + [markdown_table(n) for n in range(1, 12)]:
+            pieces = splitter._split_table(table, budget)
+            assert all(splitter.count(piece) <= budget for piece in pieces), (budget, table)
+
+
+def test_html_table_pieces_repeat_the_header():
+    splitter = chunker(40)
+    pieces = splitter._split_table(html_table(10), 40)
+    assert len(pieces) > 1
+    assert all(piece.startswith("<table><tr><th>Fund</th>") and piece.endswith("</table>") for piece in pieces)
+
+
+def test_overlap_must_be_smaller_than_the_chunk(monkeypatch):
+    with pytest.raises(ValueError):
+        TokenChunker(chunk_tokens=40, overlap_tokens=40)
+    monkeypatch.setenv("CHUNK_TOKENS", "30")
+    monkeypatch.setenv("CHUNK_OVERLAP_TOKENS", "50")
+    with pytest.raises(ValueError):
+        TokenChunker.from_env()
+
+
+def test_encoding_falls_back_without_tiktoken_cache(monkeypatch, tmp_path):
+    import tiktoken
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("openaipublic.blob.core.windows.net unreachable")
+
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(tiktoken, "get_encoding", unreachable)
+    token_budget._load_encoding.cache_clear()
+    token_budget._failed_at.clear()
+    try:
+        splitter = TokenChunker(chunk_tokens=20, overlap_tokens=5)
+        assert isinstance(splitter.encoding, ApproxEncoding)
+        pieces = splitter.split_text("The fund invests in Thai equities and bonds. " * 10)
+        assert len(pieces) > 1
+    finally:
+        token_budget._load_encoding.cache_clear()
+        token_budget._failed_at.clear()
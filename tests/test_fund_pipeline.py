@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+
+from conftest import serve
+from downloader import Downloader
+from finnomena_stub import API_PATH, create_app
+from fund_pipeline import FundCheckpoint, run_fund_pipeline, stream_funds
+
+FUNDS = 45
+PER_PAGE = 10
+PAGES = range(1, FUNDS // PER_PAGE + 3)  # runs past the end of the catalog, like the scripts
+
+
+@pytest.fixture(scope="module")
+def api_url():
+    with serve(create_app(funds=FUNDS)) as base_url:
+        yield base_url + API_PATH
+
+
+def run(api_url, tmp_path, checkpoint_path, written, stop_after=None):
+    """
+    One pipeline run against the stand-in; with `stop_after`, cancel it once that many funds are written.
+    """
+    downloader = Downloader(root=str(tmp_path / "downloads"))
+    checkpoint = FundCheckpoint(checkpoint_path)
+    enough = threading.Event()
+
+    def fetch_page(page):
+        return downloader.get_json(api_url, params={"page": page, "per_page": PER_PAGE})["data"]["funds"]
+
+    def extract(fund):
+        path = downloader.fetch(fund["fund_fact_sheet"])
+        assert path.read_bytes().startswith(b"%PDF")
+        return {"id": fund["fund_id"], "text": fund["short_code"]}
+
+    def write(doc):
+        written.append(doc["id"])
+        if stop_after is not None and len(written) >= stop_after:
+            enough.set()
+
+    async def main():
+        pipeline = asyncio.ensure_future(run_fund_pipeline(
+            stream_funds(fetch_page, PAGES, concurrency=3),
+            download=lambda fund: downloader.fetch(fund["fund_fact_sheet"]),
+            extract=extract,
+            write=write,
+            checkpoint=checkpoint,
+            download_workers=4,
+            extract_workers=2,
+        ))
+        if stop_after is None:
+            return await pipeline
+        await asyncio.to_thread(enough.wait, 30)
+        pipeline.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pipeline
+
+    return asyncio.run(main())
+
+
+def test_fetch_checkpoint_resume(api_url, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.txt"
+    written = []
+
+    # Interrupted part-way through the catalog
+    run(api_url, tmp_path, checkpoint_path, written, stop_after=12)
+    first = FundCheckpoint(checkpoint_path).done
+    assert 12 <= len(first) < FUNDS
+    assert first == set(written)
+
+    # The resumed run only processes what the first one did not checkpoint
+    stats = run(api_url, tmp_path, checkpoint_path, written)
+    assert stats["seen"] == FUNDS
+    assert stats["skipped"] == len(first)
+    assert stats["written"] == FUNDS - len(first)
+    assert stats["failed"] == 0
+
+    counts = Counter(written)
+    assert len(counts) == FUNDS
+    assert max(counts.values()) == 1
+    assert FundCheckpoint(checkpoint_path).done == set(counts)
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import List
+
+from backend.vectorstores.local_store import LocalVectorStore
+from ingestion import IndexManifest, IngestionEngine, chunk_vector_id, iter_source_documents
+
+
+class ParagraphSplitter:
+    """One chunk per blank-line separated paragraph, so a test controls exactly which chunks change."""
+
+    def split_text(self, text: str) -> List[str]:
+        return [part.strip() for part in text.split("\n\n") if part.strip()]
+
+
+class CountingEmbedding:
+    def __init__(self):
+        self.embedded: List[str] = []
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0, float(sum(map(ord, text)) % 97)] for text in texts]
+
+
+def write_source(base_dir: Path, source_id: str, paragraphs: List[str], **metadata):
+    source_dir = base_dir / source_id
+    source_dir.mkdir(parents=True, exist_ok=True)
+    (source_dir / "content.txt").write_text("\n\n".join(paragraphs), encoding="utf-8")
+    (source_dir / "meta.json").write_text(json.dumps({"title": source_id, **metadata}), encoding="utf-8")
+
+
+def stored_ids(store: LocalVectorStore) -> set:
+    return {match["id"] for match in store.query([1.0, 1.0, 1.0], top_k=1000)}
+
+
+def ids_of(source_id: str, paragraphs: List[str]) -> set:
+    return {chunk_vector_id(source_id, text) for text in paragraphs}
+
+
+def test_sync_upserts_and_deletes_against_the_manifest(tmp_path):
+    sources = tmp_path / "sources"
+    store = LocalVectorStore("test", root=str(tmp_path / "index"))
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    embedding = CountingEmbedding()
+    engine = IngestionEngine(embedding, store, batch_size=2, max_retries=1)
+
+    def sync(**kwargs):
+        return asyncio.run(engine.sync(lambda: iter_source_documents(sources), ParagraphSplitter(), manifest, **kwargs))
+
+    a = ["alpha one", "alpha two", "alpha three"]
+    b = ["beta one", "beta two"]
+    write_source(sources, "a", a)
+    write_source(sources, "b", b)
+    plan = sync()
+    assert (plan.new, plan.changed, plan.unchanged, plan.removed) == (2, 0, 0, 0)
+    assert stored_ids(store) == ids_of("a", a) | ids_of("b", b)
+    assert sorted(embedding.embedded) == sorted(a + b)
+
+    # Nothing changed: nothing is embedded, upserted or deleted
+    embedding.embedded.clear()
+    plan = sync()
+    assert (plan.new, plan.changed, plan.unchanged, plan.removed) == (0, 0, 2, 0)
+    assert (plan.upserts, plan.delete, embedding.embedded) == (0, [], [])
+
+    # One paragraph of a edited, b removed, c added
+    a_edited = ["alpha one", "alpha two, revised", "alpha three"]
+    c = ["gamma one"]
+    write_source(sources, "a", a_edited)
+    (sources / "b" / "content.txt").unlink()
+    write_source(sources, "c", c)
+    embedding.embedded.clear()
+    plan = sync()
+    assert (plan.new, plan.changed, plan.unchanged, plan.removed) == (1, 1, 0, 1)
+    assert sorted(embedding.embedded) == sorted(["alpha two, revised", "gamma one"])
+    assert set(plan.delete) == ids_of("a", ["alpha two"]) | ids_of("b", b)
+    assert stored_ids(store) == ids_of("a", a_edited) | ids_of("c", c)
+    assert set(IndexManifest(manifest.path).sources) == {"a", "c"}
+
+
+def test_metadata_change_rewrites_every_chunk_of_the_source(tmp_path):
+    sources = tmp_path / "sources"
+    store = LocalVectorStore("test", root=str(tmp_path / "index"))
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    embedding = CountingEmbedding()
+    engine = IngestionEngine(embedding, store, max_retries=1)
+
+    def sync(**kwargs):
+        return asyncio.run(engine.sync(lambda: iter_source_documents(sources), ParagraphSplitter(), manifest, **kwargs))
+
+    a = ["alpha one", "alpha two"]
+    write_source(sources, "a", a, nav=10.0, last_updated="2025-01-01")
+    sync()
+
+    # Volatile metadata alone is not a change
+    write_source(sources, "a", a, nav=10.0, last_updated="2025-02-01")
+    embedding.embedded.clear()
+    assert sync().unchanged == 1
+    assert embedding.embedded == []
+
+    write_source(sources, "a", a, nav=11.0, last_updated="2025-02-01")
+    embedding.embedded.clear()
+    plan = sync()
+    assert (plan.changed, plan.delete) == (1, [])
+    assert sorted(embedding.embedded) == sorted(a)
+    assert {match["metadata"]["nav"] for match in store.query([1.0, 1.0, 1.0], top_k=10)} == {11.0}
+
+
+def test_dry_run_leaves_the_index_and_manifest_alone(tmp_path):
+    sources = tmp_path / "sources"
+    store = LocalVectorStore("test", root=str(tmp_path / "index"))
+    manifest = IndexManifest(tmp_path / "manifest.json")
+    embedding = CountingEmbedding()
+    engine = IngestionEngine(embedding, store, max_retries=1)
+
+    write_source(sources, "a", ["alpha one"])
+    plan = asyncio.run(engine.sync(lambda: iter_source_documents(sources), ParagraphSplitter(), manifest, dry_run=True))
+    assert (plan.new, plan.upserts) == (1, 1)
+    assert (embedding.embedded, len(store), manifest.path.exists()) == ([], 0, False)
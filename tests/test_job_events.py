@@ -0,0 +1,61 @@
+import asyncio
+
+from application import JobManager
+
+
+class ScriptedGraph:
+    """
+    Stand-in for DoTACotGraph.run: two parallel steps stream interleaved tokens, then the summary streams.
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+
+    async def run(self, thread, stream_tokens=False, query=None, job_id=None):
+        for word in ("Thai ", "equities ", "rallied"):
+            yield {"token": {"type": "token", "node": "generate", "step": 0, "delta": word}}
+            yield {"token": {"type": "token", "node": "generate", "step": 1, "delta": word.upper()}}
+        yield {"execute_step": {"step_results": [{"step": 0, "answer": "Thai equities rallied"}]}}
+        await self.release.wait()
+        for word in ("Buy ", "bonds"):
+            yield {"token": {"type": "token", "node": "summary", "delta": word}}
+        yield {"summary": {"final_summary": "Buy bonds", "messages": []}}
+
+
+async def collect(manager, job):
+    return [event async for event in manager.events(job)]
+
+
+def test_finished_job_replays_one_token_event_per_node_and_step():
+    async def scenario():
+        graph = ScriptedGraph()
+        manager = JobManager(graph=graph, max_running=1)
+        await manager.start()
+        try:
+            job = await manager.submit("What should I buy?")
+            live = asyncio.create_task(collect(manager, job))
+            while not any(event["type"] == "step" for event in job.events):
+                await asyncio.sleep(0.01)
+            graph.release.set()
+            live_events = await live
+            replayed = await collect(manager, job)
+        finally:
+            await manager.stop()
+        return job, live_events, replayed
+
+    job, live_events, replayed = asyncio.run(scenario())
+
+    assert job.status == "done"
+    # A reader that was streaming gets every token as it came
+    assert sum(event["type"] == "token" for event in live_events) == 8
+    assert live_events[-1]["type"] == "done"
+
+    assert [event["type"] for event in replayed] == ["queued", "started", "token", "token", "step", "token", "node", "done"]
+    tokens = [event for event in replayed if event["type"] == "token"]
+    assert [(event["node"], event.get("step"), event["delta"]) for event in tokens] == [
+        ("generate", 0, "Thai equities rallied"),
+        ("generate", 1, "THAI EQUITIES RALLIED"),
+        ("summary", None, "Buy bonds"),
+    ]
+    assert replayed[-1]["result"]["final_summary"] == "Buy bonds"
+    assert job.events == replayed
@@ -0,0 +1,48 @@
+import asyncio
+
+from backend.nodes.namespace_prediction import NamespacePredictionNode
+from backend.utils.cache import SQLiteKVStore, SQLiteLLMCache
+from benchmarks.fakes import FakeChatModel
+
+
+class CountingChatModel(FakeChatModel):
+    calls: int = 0
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        return await super()._agenerate(messages, stop, run_manager, **kwargs)
+
+
+def make_node(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    node = NamespacePredictionNode(votes=4, mode="concurrent", use_classifier=False)
+    node.llm = CountingChatModel(model="gpt-4o-mini", cache=False)
+    node.cache = SQLiteLLMCache(SQLiteKVStore(str(tmp_path / "llm_cache.sqlite")))
+    return node
+
+
+def test_votes_skip_the_cache_and_the_namespace_is_cached(monkeypatch, tmp_path):
+    node = make_node(monkeypatch, tmp_path)
+    state = lambda: {"rewritten_query": "What is the 1Y return of PRINCIPAL FI?", "messages": []}
+
+    first = asyncio.run(node.run(state()))
+    # Each vote is its own request; a majority of 4 needs at least 3
+    assert node.llm.calls >= 3
+    assert first["namespace"] in ("fund", "economy")
+    # Only the aggregated namespace was stored, not one entry per vote
+    assert len(node.cache.store) == 1
+
+    calls = node.llm.calls
+    second = asyncio.run(node.run(state()))
+    assert node.llm.calls == calls
+    assert second["namespace"] == first["namespace"]
+
+
+def test_cache_disabled_always_votes(monkeypatch, tmp_path):
+    node = make_node(monkeypatch, tmp_path)
+    node.cache = None
+    state = {"rewritten_query": "Inflation outlook for 2025?", "messages": []}
+    asyncio.run(node.run(dict(state, messages=[])))
+    calls = node.llm.calls
+    asyncio.run(node.run(dict(state, messages=[])))
+    assert node.llm.calls > calls
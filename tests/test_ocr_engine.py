@@ -0,0 +1,145 @@
+import base64
+import concurrent.futures
+import json
+import os
+from types import SimpleNamespace
+
+import fitz
+import pytest
+
+import ocr_engine
+
+
+@pytest.fixture
+def fake_poppler(monkeypatch, tmp_path):
+    """
+    typhoon_ocr refuses to import without pdfinfo/pdftoppm on PATH; rendering here never calls them.
+    """
+    pytest.importorskip("pypdf")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name in ("pdfinfo", "pdftoppm"):
+        tool = bin_dir / name
+        tool.write_text("#!/bin/sh\nexit 1\n")
+        tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    ocr_engine.typhoon_helpers.cache_clear()
+    try:
+        ocr_engine.typhoon_helpers()
+    except RuntimeError:
+        pytest.skip("typhoon_ocr is not installed")
+    yield
+    ocr_engine.typhoon_helpers.cache_clear()
+
+
+def make_pdf(path, pages: int = 3) -> str:
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 72), f"Page {i + 1} of the fund fact sheet")
+        page.insert_text((80, 300), f"Second block {i + 1}")
+        page.insert_image(fitz.Rect(100, 400, 200, 500), pixmap=fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 8, 8), 0))
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_render_pages_anchor_text_matches_typhoon_ocr(fake_poppler, tmp_path):
+    from typhoon_ocr import get_anchor_text
+
+    pdf = make_pdf(tmp_path / "doc.pdf")
+    for page_index, image, anchor_text in ocr_engine.render_pages(pdf, [0, 1, 2], target_image_dim=200):
+        assert image.startswith(b"\x89PNG")
+        assert anchor_text == get_anchor_text(pdf, page_index + 1, pdf_engine="pdfreport", target_length=8000)
+
+
+class FakeTyphoon:
+    """
+    Stands in for the OpenAI client: answers with the text "rendered" into the stub page image.
+    """
+
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, **kwargs):
+        image_url = messages[0]["content"][1]["image_url"]["url"]
+        text = base64.b64decode(image_url.split(",", 1)[1]).decode("utf-8")
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"natural_text": text})))])
+
+
+@pytest.fixture
+def stub_ocr(monkeypatch, tmp_path):
+    """
+    OCREngine factory whose pages are rendered and OCR'd in-process; records the pages sent to `_ocr_image`.
+    """
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(ocr_engine, "get_render_pool", lambda workers: pool)
+    monkeypatch.setattr(ocr_engine, "render_pages", lambda path, page_indexes, target_image_dim: [
+        (i, f"page {i + 1}".encode("utf-8"), "") for i in page_indexes
+    ])
+    monkeypatch.setattr(ocr_engine, "typhoon_helpers", lambda: (lambda task_type: lambda anchor_text: task_type, None))
+    cache = ocr_engine.OCRPageCache(str(tmp_path / "ocr.sqlite"))
+    calls, failing = [], set()
+
+    def make_engine(task_type: str = "default") -> ocr_engine.OCREngine:
+        engine = ocr_engine.OCREngine(workers=2, rate_per_sec=1000, cache=cache, text_layer=False,
+                                      render_workers=1, task_type=task_type)
+        engine.client = FakeTyphoon()
+        ocr_image = engine._ocr_image
+
+        def stub_ocr_image(page_index, *args):
+            calls.append((task_type, page_index))
+            if page_index in failing:
+                raise RuntimeError("OCR service unavailable")
+            return ocr_image(page_index, *args)
+
+        monkeypatch.setattr(engine, "_ocr_image", stub_ocr_image)
+        return engine
+
+    yield SimpleNamespace(make_engine=make_engine, calls=calls, failing=failing, cache=cache)
+    pool.shutdown()
+
+
+def test_rerun_only_ocrs_pages_missing_from_the_cache(stub_ocr, tmp_path):
+    pdf = make_pdf(tmp_path / "doc.pdf", pages=3)
+    stub_ocr.failing.add(1)
+    text, paths = stub_ocr.make_engine().extract_pdf(pdf)
+    assert paths == ["ocr", "failed", "ocr"]
+    assert text == "page 1\n\npage 3"
+    assert sorted(stub_ocr.calls) == [("default", 0), ("default", 1), ("default", 2)]
+
+    stub_ocr.failing.clear()
+    stub_ocr.calls.clear()
+    engine = stub_ocr.make_engine()
+    text, paths = engine.extract_pdf(pdf)
+    assert paths == ["ocr", "ocr", "ocr"]
+    assert text == "page 1\n\npage 2\n\npage 3"
+    assert stub_ocr.calls == [("default", 1)]
+    assert engine.pages_cached == 2
+
+    stub_ocr.calls.clear()
+    assert stub_ocr.make_engine().extract_pdf(pdf)[0] == text
+    assert stub_ocr.calls == []
+
+
+def test_cache_key_follows_pdf_bytes_and_task_type(stub_ocr, tmp_path):
+    pdf = make_pdf(tmp_path / "doc.pdf", pages=2)
+    stub_ocr.make_engine().extract_pdf(pdf)
+    assert sorted(stub_ocr.calls) == [("default", 0), ("default", 1)]
+
+    stub_ocr.calls.clear()
+    stub_ocr.make_engine(task_type="structure").extract_pdf(pdf)
+    assert sorted(stub_ocr.calls) == [("structure", 0), ("structure", 1)]
+
+    # Same name and page count, different bytes
+    sha = ocr_engine.file_sha256(pdf)
+    with fitz.open(pdf) as doc:
+        doc[0].insert_text((50, 600), "Revised fee table")
+        doc.saveIncr()
+    assert ocr_engine.file_sha256(pdf) != sha
+    stub_ocr.calls.clear()
+    stub_ocr.make_engine().extract_pdf(pdf)
+    assert sorted(stub_ocr.calls) == [("default", 0), ("default", 1)]
+
+    key = ocr_engine.OCRPageCache.key
+    assert len({key(sha, 1, "default"), key(sha, 2, "default"), key(sha, 1, "structure"), key("0" * 64, 1, "default")}) == 4
@@ -0,0 +1,22 @@
+import asyncio
+
+from backend.nodes.rerank import RerankNode
+
+
+def test_client_is_reused_per_loop_and_closed_with_it(monkeypatch):
+    monkeypatch.setenv("COHERE_API_KEY", "test")
+    node = RerankNode()
+    pools = []
+
+    async def use():
+        client = await node.get_client()
+        assert await node.get_client() is client
+        pool = client._client_wrapper.httpx_client.httpx_client
+        assert not pool.is_closed
+        pools.append(pool)
+
+    for _ in range(3):
+        asyncio.run(use())
+
+    assert len({id(pool) for pool in pools}) == 3
+    assert all(pool.is_closed for pool in pools)
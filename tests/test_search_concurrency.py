@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from backend.nodes import search
+from backend.vectorstores import VectorStore
+from benchmarks.fakes import FakeProfile, Latency
+from conftest import run_graph
+
+LATENCY = 0.2
+SEARCHES = 8
+
+
+class SlowIndex(VectorStore):
+    """Blocks like the Pinecone client for LATENCY seconds per query."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def query(self, vector, top_k=100):
+        time.sleep(LATENCY)
+        return [{"id": f"{self.name}-0", "score": 1.0, "metadata": {"page_content": "doc"}}]
+
+
+class SlowEmbeddings:
+    async def aembed_query(self, text):
+        await asyncio.sleep(LATENCY)
+        return [0.0] * 8
+
+
+def test_concurrent_searches_overlap(monkeypatch):
+    monkeypatch.setattr(search, "get_embeddings", SlowEmbeddings)
+    monkeypatch.setattr(search, "get_vector_store", SlowIndex)
+    node = search.SearchNode()
+
+    async def run_all():
+        states = [{"rewritten_query": f"q{i}", "namespace": "fund", "messages": []} for i in range(SEARCHES)]
+        return await asyncio.gather(*[node.run(state) for state in states])
+
+    started = time.perf_counter()
+    results = asyncio.run(run_all())
+    elapsed = time.perf_counter() - started
+
+    assert all(len(state["documents"]) == 1 for state in results)
+    # Serialized, each search costs 2 x LATENCY (embedding + index query)
+    assert elapsed < SEARCHES * 2 * LATENCY / 4
+
+
+def test_parallel_graph_runs_overlap_their_search_phases(offline_graph):
+    runs = 6
+    graph = offline_graph(FakeProfile(
+        plan_size=1, llm=Latency(0.02), embedding=Latency(0.02), vector=Latency(LATENCY), rerank=Latency(0.02),
+    ))
+
+    async def run_all():
+        return await asyncio.gather(*[run_graph(graph, f"question {i}", f"job-{i}") for i in range(runs)])
+
+    intervals = [
+        (entry["started_at"], entry["started_at"] + entry["wall"])
+        for result in asyncio.run(run_all()) for entry in result["trace"] if entry["node"] == "search"
+    ]
+    assert len(intervals) == runs
+
+    # Every search was still running when the last one started...
+    assert max(start for start, _ in intervals) < min(end for _, end in intervals)
+    # ...and their index queries ran side by side rather than back to back
+    assert max(end for _, end in intervals) - min(start for start, _ in intervals) < runs * LATENCY / 2
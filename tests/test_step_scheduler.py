@@ -0,0 +1,93 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from backend.nodes.planner import CoTPlannerNode
+from backend.nodes.step_scheduler import StepSchedulerNode
+from benchmarks.fakes import FakeProfile, Latency
+from conftest import run_graph
+
+
+def step(depends_on=(), intent="fund"):
+    return {"step": "research", "intent": intent, "depends_on": list(depends_on)}
+
+
+def result(index):
+    return {"step": index, "intent": "fund", "answer": f"answer {index}", "messages": [AIMessage(content=f"m{index}")]}
+
+
+def state(plan, done=()):
+    return {"query": "q", "job_id": "job", "cot_plan": plan, "step_results": [result(i) for i in done], "messages": []}
+
+
+def test_independent_steps_fan_out_as_sends():
+    sends = StepSchedulerNode().dispatch(state([step(), step(), step()]))
+
+    assert [send.node for send in sends] == ["execute_step"] * 3
+    assert [send.arg["current_step"] for send in sends] == [0, 1, 2]
+    assert all(send.arg["all_answers"] == [] for send in sends)
+
+
+def test_dependents_wait_for_their_dependencies():
+    scheduler = StepSchedulerNode()
+    plan = [step(), step(), step([0, 1])]
+
+    assert [send.arg["current_step"] for send in scheduler.dispatch(state(plan))] == [0, 1]
+    # With only step 0 answered, step 2 still waits on step 1
+    assert scheduler.ready_steps(state(plan, done=[0])) == [1]
+
+    sends = scheduler.dispatch(state(plan, done=[1, 0]))
+    assert [send.arg["current_step"] for send in sends] == [2]
+    # The branch sees only its dependencies' answers, in plan order and without messages
+    assert [answer["step"] for answer in sends[0].arg["all_answers"]] == [0, 1]
+    assert all("messages" not in answer for answer in sends[0].arg["all_answers"])
+
+    assert scheduler.dispatch(state(plan, done=[0, 1, 2])) == "summary"
+
+
+def test_merge_keeps_plan_order():
+    merged = asyncio.run(StepSchedulerNode().merge(state([step(), step(), step()], done=[2, 0, 1])))
+
+    assert [answer["step"] for answer in merged["all_answers"]] == [0, 1, 2]
+    assert all("messages" not in answer for answer in merged["all_answers"])
+    assert [m.content for m in merged["messages"][:3]] == ["m0", "m1", "m2"]
+    assert merged["answer"] == "answer 2"
+    assert merged["done"] is True
+
+
+def test_normalize_plan_drops_forward_self_and_invalid_dependencies():
+    plan = CoTPlannerNode.normalize_plan([
+        {"step": "a", "intent": "fund", "depends_on": [0, 1]},
+        {"step": "b", "depends_on": "0"},
+        {"step": "c", "depends_on": [2, 5, "x", None, 1, 1, -1]},
+    ])
+
+    assert [s["depends_on"] for s in plan] == [[], [0], [1]]
+    assert plan[1]["intent"] == "unknown"
+    assert CoTPlannerNode.normalize_plan({"steps": [{"step": "a"}]}) == [{"step": "a", "intent": "unknown", "depends_on": []}]
+
+
+def test_unsatisfiable_plan_falls_back_to_the_first_pending_step():
+    # A cycle that did not go through normalize_plan must not stall the run
+    plan = [step([1]), step([0])]
+    scheduler = StepSchedulerNode()
+
+    assert scheduler.ready_steps(state(plan)) == [0]
+    assert scheduler.ready_steps(state(plan, done=[0])) == [1]
+
+
+def test_graph_runs_dependent_step_after_its_dependencies(offline_graph):
+    # fake_plan(3): steps 0 and 1 are independent, step 2 depends on both
+    graph = offline_graph(FakeProfile(plan_size=3, llm=Latency(0.02), embedding=Latency(0.01),
+                                      vector=Latency(0.01), rerank=Latency(0.01)))
+    outcome = asyncio.run(run_graph(graph, "question", "job"))
+
+    assert [answer["step"] for answer in outcome["all_answers"]] == [0, 1, 2]
+    spans = {}
+    for entry in outcome["trace"]:
+        if entry["step"] is not None:
+            start, end = spans.get(entry["step"], (float("inf"), 0.0))
+            spans[entry["step"]] = (min(start, entry["started_at"]), max(end, entry["started_at"] + entry["wall"]))
+    # Independent steps ran side by side; the dependent one started after both finished
+    assert spans[1][0] < spans[0][1] and spans[0][0] < spans[1][1]
+    assert spans[2][0] >= max(spans[0][1], spans[1][1])
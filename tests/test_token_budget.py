@@ -0,0 +1,76 @@
+import pytest
+
+from backend.utils import token_budget
+from backend.utils.token_budget import ApproxEncoding, Segment, TokenBudget
+
+
+@pytest.fixture
+def offline_tiktoken(monkeypatch, tmp_path):
+    """
+    tiktoken with an empty cache and no network: loading any encoding fails.
+    """
+    import tiktoken
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("openaipublic.blob.core.windows.net unreachable")
+
+    monkeypatch.setenv("TIKTOKEN_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(tiktoken, "encoding_for_model", unreachable)
+    monkeypatch.setattr(tiktoken, "get_encoding", unreachable)
+    token_budget._load_encoding.cache_clear()
+    token_budget._failed_at.clear()
+    yield
+    token_budget._load_encoding.cache_clear()
+    token_budget._failed_at.clear()
+
+
+def test_pack_without_tiktoken_cache(offline_tiktoken):
+    budget = TokenBudget(50, "gpt-4o")
+    assert isinstance(budget.encoding, ApproxEncoding)
+
+    segments = [Segment("a" * 400, priority=-i, min_tokens=10) for i in range(3)]
+    packed = budget.pack(segments)
+
+    assert budget.count(packed) <= 50 + len(segments)
+    assert packed.startswith("a" * 40)
+
+
+def test_fit_reports_dropped_segments(offline_tiktoken):
+    budget = TokenBudget(30, "gpt-4o")
+    segments = [Segment(f"{i}" * 80, priority=-i, min_tokens=20) for i in range(3)]
+
+    kept = budget.fit(segments)
+
+    assert len(kept) == 3
+    assert kept[0].startswith("0" * 40)
+    assert kept[2] == ""
+
+
+def test_fit_within_budget_is_unchanged(offline_tiktoken):
+    segments = [Segment("short"), Segment("text")]
+    assert TokenBudget(100).fit(segments) == ["short", "text"]
+    assert TokenBudget(100).pack(segments, separator=" ") == "short text"
+
+
+def test_fit_with_truncation_mark_stays_within_budget(offline_tiktoken):
+    for limit in range(1, 60):
+        budget = TokenBudget(limit, "gpt-4o")
+        segments = [Segment("b" * 90, priority=1, min_tokens=5), Segment("a" * 203, min_tokens=3)]
+        kept = budget.fit(segments)
+        assert sum(budget.count(text) for text in kept) <= limit, limit
+        for max_tokens in range(0, 60):
+            assert budget.count(budget.truncate("a" * 203, max_tokens)) <= max_tokens
+
+
+def test_encoding_is_retried_after_a_failed_load(offline_tiktoken, monkeypatch):
+    import tiktoken
+
+    budget = TokenBudget(50, "gpt-4o")
+    assert isinstance(budget.encoding, ApproxEncoding)
+
+    loaded = object()
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: loaded)
+    # Within the retry interval the failure is remembered, after it the encoding is loaded again
+    assert isinstance(budget.encoding, ApproxEncoding)
+    monkeypatch.setattr(token_budget, "ENCODING_RETRY_SECONDS", 0)
+    assert budget.encoding is loaded